@@ -1,24 +1,65 @@
-from typing import Tuple
+from typing import AsyncIterator, List, Tuple
 import io
-from openai import OpenAI
+import wave
 
-from app.utils.config import OPENAI_API_KEY, WHISPER_MODEL
+from app.utils.llm import get_client
+from app.utils.router import routed_call
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-
-def transcribe_audio_bytes(data: bytes, filename: str) -> Tuple[str, float]:
+async def transcribe_audio_bytes(data: bytes, filename: str) -> Tuple[str, float]:
     """
     Transcribe audio using OpenAI Whisper without relying on ffmpeg/pydub.
     Duration is set to 0.0 (not critical for downstream use).
+    Retried on transient errors but never hedged (too expensive to duplicate).
     """
-    temp_file = io.BytesIO(data)
-    temp_file.name = filename
-
-    transcript = client.audio.transcriptions.create(
-        model=WHISPER_MODEL,
-        file=temp_file,
-        response_format="text",
-    )
+
+    def upload(model: str):
+        # A fresh file object per attempt: a retried upload must start at byte 0.
+        temp_file = io.BytesIO(data)
+        temp_file.name = filename
+        return get_client().audio.transcriptions.create(
+            model=model,
+            file=temp_file,
+            response_format="text",
+        )
+
+    transcript = await routed_call("transcription", upload)
     text = transcript.strip()
     return text, 0.0
+
+
+def split_wav(data: bytes, segment_seconds: float) -> List[bytes]:
+    """
+    Cut a WAV file into standalone WAV segments (stdlib only). Other formats
+    cannot be split without ffmpeg, so they come back as a single segment.
+    """
+    try:
+        src = wave.open(io.BytesIO(data), "rb")
+    except (wave.Error, EOFError):
+        return [data]
+
+    with src:
+        params = src.getparams()
+        frames_per_segment = max(1, int(segment_seconds * params.framerate))
+        segments = []
+        while True:
+            frames = src.readframes(frames_per_segment)
+            if not frames:
+                break
+            buf = io.BytesIO()
+            with wave.open(buf, "wb") as out:
+                out.setparams(params)
+                out.writeframes(frames)
+            segments.append(buf.getvalue())
+    return segments or [data]
+
+
+async def iter_transcript_batches(
+    data: bytes, filename: str, segment_seconds: float
+) -> AsyncIterator[str]:
+    """Progressive variant: transcribe and yield one segment at a time."""
+    segments = split_wav(data, segment_seconds)
+    for i, segment in enumerate(segments):
+        name = filename if len(segments) == 1 else f"part{i + 1}-{filename}"
+        text, _ = await transcribe_audio_bytes(segment, name)
+        yield text
@@ -1,33 +1,41 @@
 import base64
 from typing import Tuple
 
-from app.utils.llm import client
-from app.utils.config import OPENAI_MODEL
+from app.utils.llm import get_client
+from app.utils.router import routed_call
 
 
-def extract_image_text_from_bytes(data: bytes) -> Tuple[str, float]:
+async def extract_image_text_from_bytes(
+    data: bytes, mime_type: str = "image/png"
+) -> Tuple[str, float]:
     """
     Use OpenAI vision (gpt-4o*) to read text from an image.
     Returns text and a dummy confidence (1.0 on success).
+    OCR is idempotent, so slow calls are hedged.
     """
     b64 = base64.b64encode(data).decode("utf-8")
-    image_url = f"data:image/png;base64,{b64}"
+    image_url = f"data:{mime_type};base64,{b64}"
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": "Extract all visible text from this image. Return plain text only.",
+                },
+                {"type": "image_url", "image_url": {"url": image_url}},
+            ],
+        }
+    ]
 
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": "Extract all visible text from this image. Return plain text only.",
-                    },
-                    {"type": "image_url", "image_url": {"url": image_url}},
-                ],
-            }
-        ],
-        temperature=0,
+    resp = await routed_call(
+        "ocr",
+        lambda model: get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0,
+        ),
+        hedge=True,
     )
 
     text = resp.choices[0].message.content or ""
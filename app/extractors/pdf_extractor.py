@@ -1,10 +1,10 @@
-from typing import Tuple
-import pdfplumber
-from pdf2image import convert_from_bytes
-import pytesseract
+from typing import Iterator, Tuple
 from io import BytesIO
 
 def extract_pdf_text_from_bytes(data: bytes) -> Tuple[str, float]:
+    # PDF/OCR libraries are heavy; only workers that actually see a PDF load them.
+    import pdfplumber
+
     text_parts = []
 
     with pdfplumber.open(BytesIO(data)) as pdf:
@@ -12,9 +12,13 @@ def extract_pdf_text_from_bytes(data: bytes) -> Tuple[str, float]:
             txt = page.extract_text() or ""
             text_parts.append(txt)
 
-    text = "\n".join(text_parts).strip()
+    # Form feed between pages: lets compaction spot per-page headers/footers.
+    text = "\f".join(text_parts).strip()
 
     if len(text) < 30:
+        from pdf2image import convert_from_bytes
+        import pytesseract
+
         images = convert_from_bytes(data)
         ocr_texts = []
         confidences = []
@@ -28,9 +32,35 @@ def extract_pdf_text_from_bytes(data: bytes) -> Tuple[str, float]:
                     confidences.append(sum(confs) / len(confs))
             except Exception:
                 pass
-        text = "\n".join(ocr_texts).strip()
+        text = "\f".join(ocr_texts).strip()
         conf = sum(confidences) / max(len(confidences), 1) if confidences else 0.0
     else:
         conf = 1.0  # assume good if text layer present
 
     return text, conf
+
+
+def iter_pdf_text_batches(data: bytes, batch_pages: int = 10) -> Iterator[str]:
+    """
+    Progressive variant: yield the text of `batch_pages` pages at a time.
+    Batches without a usable text layer are OCR'd page range by page range,
+    so the first pages are available long before a large scan is finished.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        total = len(pdf.pages)
+        for start in range(0, total, batch_pages):
+            pages = pdf.pages[start : start + batch_pages]
+            text = "\f".join((p.extract_text() or "") for p in pages).strip()
+
+            if len(text) < 30:
+                from pdf2image import convert_from_bytes
+                import pytesseract
+
+                images = convert_from_bytes(
+                    data, first_page=start + 1, last_page=start + len(pages)
+                )
+                text = "\f".join(pytesseract.image_to_string(img) for img in images).strip()
+
+            yield text
@@ -0,0 +1,167 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from app.utils.admission import admission
+from app.utils.cancellation import cancellations, on_turn_cancel
+
+_SENTINEL = object()
+
+
+class ExtractionCancelled(Exception):
+    """The job was stopped (its request went away) before it finished."""
+
+
+async def iterate_in_thread(make_gen: Callable[[], Iterator[str]]) -> AsyncIterator[str]:
+    """
+    Drive a blocking generator from a worker thread, one item at a time.
+    A dedicated single worker serializes next() and close(), so a cancelled
+    consumer stops the generator after the item in progress without waiting.
+    """
+    loop = asyncio.get_running_loop()
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progressive")
+    gen = None
+    try:
+        gen = await loop.run_in_executor(worker, make_gen)
+        while True:
+            item = await loop.run_in_executor(worker, next, gen, _SENTINEL)
+            if item is _SENTINEL:
+                return
+            yield item
+    finally:
+        if gen is not None:
+            worker.submit(gen.close)
+        worker.shutdown(wait=False)
+
+
+class ProgressiveExtraction:
+    """
+    A running extraction that publishes text batches (pages / audio segments)
+    as they are produced. Consumers can wait for the first batch, iterate
+    over batches while extraction continues, or wait for the full text.
+
+    When the source is exhausted, `on_complete(full_text)` runs (e.g. to
+    register the document); its return value is kept in `result`.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[str],
+        resource: Optional[str] = None,
+        on_complete: Optional[Callable[[str], Awaitable[object]]] = None,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.batches: List[str] = []
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+        self.result: object = None
+        self._event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(source, resource, on_complete))
+
+    def _notify(self) -> None:
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def _run(self, source, resource, on_complete) -> None:
+        try:
+            async with admission.resource(resource):
+                async for batch in source:
+                    self.batches.append(batch)
+                    self._notify()
+            if on_complete is not None:
+                self.result = await on_complete(self.text_so_far)
+        except asyncio.CancelledError:
+            # Not stored as `error`: re-raising a CancelledError in whichever
+            # turn later looks at the job would cancel that turn instead.
+            self.cancelled = True
+            raise
+        except Exception as e:  # surfaced to consumers
+            self.error = e
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    @property
+    def usable(self) -> bool:
+        """False once the job was cancelled or failed; its text is incomplete."""
+        return not self.cancelled and self.error is None
+
+    def _raise_if_failed(self) -> None:
+        if self.cancelled:
+            raise ExtractionCancelled("extraction was cancelled")
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self) -> None:
+        """Stop extracting; batches produced so far are discarded."""
+        if not self.done:
+            self._task.cancel()
+            cancellations.record("extraction_jobs")
+
+    async def _wait_for(self, count: int) -> None:
+        while len(self.batches) < count and not self.done:
+            await self._event.wait()
+
+    @property
+    def text_so_far(self) -> str:
+        return "\n".join(self.batches)
+
+    async def first_batch(self) -> str:
+        await self._wait_for(1)
+        if not self.batches:
+            self._raise_if_failed()
+        return self.batches[0] if self.batches else ""
+
+    async def iter_batches(self) -> AsyncIterator[str]:
+        seen = 0
+        while True:
+            await self._wait_for(seen + 1)
+            while seen < len(self.batches):
+                yield self.batches[seen]
+                seen += 1
+            if self.done:
+                self._raise_if_failed()
+                return
+
+    async def full_text(self) -> str:
+        # Waits on the job's own events, so a caller being cancelled never
+        # cancels the job (and vice versa).
+        while not self.done:
+            await self._event.wait()
+        self._raise_if_failed()
+        return self.text_so_far
+
+
+# Jobs by id (the graph state only carries the id). A job stays here until
+# the graph settles it, or until it has been finished for _FINISHED_TTL.
+_jobs: Dict[str, ProgressiveExtraction] = {}
+_FINISHED_TTL = 600.0
+
+
+def start_job(
+    source: AsyncIterator[str],
+    resource: Optional[str] = None,
+    on_complete: Optional[Callable[[str], Awaitable[object]]] = None,
+) -> ProgressiveExtraction:
+    now = time.monotonic()
+    for job_id, old in list(_jobs.items()):
+        if old.finished_at is not None and now - old.finished_at > _FINISHED_TTL:
+            del _jobs[job_id]
+    job = ProgressiveExtraction(source, resource, on_complete)
+    _jobs[job.job_id] = job
+    # A job outlives the node that started it; stop it if the request is cancelled.
+    on_turn_cancel(job.cancel)
+    return job
+
+
+def get_job(job_id: Optional[str]) -> Optional[ProgressiveExtraction]:
+    return _jobs.get(job_id) if job_id else None
+
+
+def pop_job(job_id: Optional[str]) -> Optional[ProgressiveExtraction]:
+    return _jobs.pop(job_id, None) if job_id else None
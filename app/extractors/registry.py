@@ -0,0 +1,309 @@
+import asyncio
+import io
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, FrozenSet, List, Optional
+
+from app.extractors.audio_transcriber import iter_transcript_batches, transcribe_audio_bytes
+from app.extractors.image_ocr import extract_image_text_from_bytes
+from app.extractors.pdf_extractor import extract_pdf_text_from_bytes, iter_pdf_text_batches
+from app.extractors.progressive import iterate_in_thread
+from app.utils.config import (
+    MAX_UPLOAD_BYTES,
+    PROGRESSIVE_AUDIO_SEGMENT_SECONDS,
+    PROGRESSIVE_PDF_BATCH_PAGES,
+)
+
+# Bytes needed by sniff_kind(); callers with a stored file only read this much.
+SNIFF_BYTES = 64 * 1024
+
+_EXTENSION_KINDS = {
+    ".pdf": "pdf",
+    ".png": "png",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".gif": "gif",
+    ".webp": "webp",
+    ".wav": "wav",
+    ".mp3": "mp3",
+    ".m4a": "m4a",
+    ".mp4": "m4a",
+    ".ogg": "ogg",
+    ".flac": "flac",
+    ".webm": "webm",
+    ".docx": "docx",
+    ".txt": "text",
+    ".md": "text",
+    ".markdown": "text",
+    ".csv": "text",
+    ".tsv": "text",
+    ".json": "text",
+    ".log": "text",
+}
+
+_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The sniffed prefix may end in the middle of a multi-byte character.
+        return e.start >= len(head) - 3
+    return True
+
+
+def sniff_kind(head: bytes, file_name: str = "", content_type: str = "") -> str:
+    """
+    Detect the file kind from its leading bytes (magic numbers). The name and
+    content type are only hints for formats without a reliable signature, so
+    a PDF uploaded as "scan.png" / image/png is still treated as a PDF.
+    """
+    ext = os.path.splitext(file_name.lower())[1]
+    hinted = _EXTENSION_KINDS.get(ext)
+
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):  # UTF-16 BOM, before the MP3 sync check
+        return "text"
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if head[4:8] == b"ftyp":
+        # ISO media: audio/video unless the brand is a still-image format (HEIC/AVIF).
+        return "unknown" if head[8:12] in (b"heic", b"heix", b"mif1", b"avif") else "m4a"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"fLaC"):
+        return "flac"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx" if b"word/" in head or hinted == "docx" else "unknown"
+    if head and _looks_like_text(head):
+        return "text"
+
+    # Empty or unrecognised bytes: fall back to the declared type.
+    if hinted:
+        return hinted
+    content_type = (content_type or "").lower()
+    if content_type.startswith("text/"):
+        return "text"
+    return "unknown"
+
+
+# ---------- Built-in extractors ----------
+
+
+def _decode_text(data: bytes) -> str:
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16")
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+async def _extract_text(data: bytes, file_name: str, kind: str) -> str:
+    # A multi-MB decode (and the latin-1 retry) would stall the event loop.
+    text = await asyncio.to_thread(_decode_text, data)
+    return text.strip()
+
+
+def _docx_text(data: bytes) -> str:
+    """Paragraph text of word/document.xml (tables included), stdlib only."""
+    import zipfile
+    from xml.etree import ElementTree
+
+    ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        # A small zip can inflate to gigabytes; check the declared size first.
+        size = zf.getinfo("word/document.xml").file_size
+        if size > MAX_UPLOAD_BYTES:
+            raise ValueError(
+                f"word/document.xml expands to {size} bytes (limit {MAX_UPLOAD_BYTES})."
+            )
+        root = ElementTree.fromstring(zf.read("word/document.xml"))
+
+    paragraphs = []
+    for p in root.iter(f"{ns}p"):
+        parts = []
+        for node in p.iter():
+            if node.tag == f"{ns}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{ns}tab":
+                parts.append("\t")
+            elif node.tag in (f"{ns}br", f"{ns}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+
+async def _extract_docx(data: bytes, file_name: str, kind: str) -> str:
+    return await asyncio.to_thread(_docx_text, data)
+
+
+async def _extract_pdf(data: bytes, file_name: str, kind: str) -> str:
+    text, _ = await asyncio.to_thread(extract_pdf_text_from_bytes, data)
+    return text
+
+
+def _pdf_batches(data: bytes, file_name: str, kind: str) -> AsyncIterator[str]:
+    return iterate_in_thread(lambda: iter_pdf_text_batches(data, PROGRESSIVE_PDF_BATCH_PAGES))
+
+
+async def _extract_image(data: bytes, file_name: str, kind: str) -> str:
+    text, _ = await extract_image_text_from_bytes(data, _MIME_TYPES.get(kind, "image/png"))
+    return text
+
+
+def _audio_name(file_name: str, kind: str) -> str:
+    # Whisper picks the decoder from the extension; make it match the bytes.
+    name = file_name or "audio"
+    return name if name.lower().endswith(f".{kind}") else f"{name}.{kind}"
+
+
+async def _extract_audio(data: bytes, file_name: str, kind: str) -> str:
+    text, _ = await transcribe_audio_bytes(data, _audio_name(file_name, kind))
+    return text
+
+
+def _audio_batches(data: bytes, file_name: str, kind: str) -> AsyncIterator[str]:
+    # Only WAV is split into segments; other formats come back as one batch.
+    return iter_transcript_batches(
+        data, _audio_name(file_name, kind), PROGRESSIVE_AUDIO_SEGMENT_SECONDS
+    )
+
+
+# Rough cost model (seconds for `size` bytes). Only the order of magnitude
+# matters: it separates free decodes from OCR / transcription work.
+def _text_cost(size: int) -> float:
+    return size / 100e6
+
+
+def _docx_cost(size: int) -> float:
+    return 0.05 + size / 5e6
+
+
+def _pdf_cost(size: int) -> float:
+    # Text-layer PDFs; scans that need OCR cost more, which is only known later.
+    return 0.2 + size / 1e6
+
+
+def _image_cost(size: int) -> float:
+    return 3.0  # one vision call
+
+
+def _audio_cost(size: int) -> float:
+    duration = size / 16e3  # ~128 kbit/s
+    return 2.0 + duration / 10
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """
+    One way of turning file bytes into text.
+
+    - kinds: sniffed kinds it handles (see sniff_kind)
+    - source_type: recorded on the registered document
+    - extract(data, file_name, kind) -> text
+    - cost(size_bytes) -> estimated seconds, for scheduling decisions
+    - resource: admission resource held while extracting (None = no limit)
+    - iter_batches(data, file_name, kind): optional progressive variant
+    - priority: higher wins when several extractors handle a kind
+    - interruptible: False when the work runs in a worker thread and cannot
+      be stopped by cancelling the request (it is finished and cached instead)
+    """
+
+    name: str
+    kinds: FrozenSet[str]
+    source_type: str
+    extract: Callable[[bytes, str, str], Awaitable[str]]
+    cost: Callable[[int], float]
+    resource: Optional[str] = None
+    iter_batches: Optional[Callable[[bytes, str, str], AsyncIterator[str]]] = None
+    priority: int = 0
+    interruptible: bool = True
+
+
+@dataclass
+class ExtractionPlan:
+    kind: str
+    extractor: Extractor
+    estimated_seconds: float
+
+
+class ExtractorRegistry:
+    """Extractors by kind, tried in priority order (ties: first registered)."""
+
+    def __init__(self):
+        self._extractors: List[Extractor] = []
+
+    def register(self, extractor: Extractor) -> Extractor:
+        self._extractors.append(extractor)
+        self._extractors.sort(key=lambda e: -e.priority)  # stable
+        return extractor
+
+    def find(self, kind: str) -> Optional[Extractor]:
+        return next((e for e in self._extractors if kind in e.kinds), None)
+
+    def plan(
+        self, head: bytes, size: int, file_name: str = "", content_type: str = ""
+    ) -> Optional[ExtractionPlan]:
+        """Sniff the file and pick its extractor; None when nothing handles it."""
+        kind = sniff_kind(head, file_name, content_type)
+        extractor = self.find(kind)
+        if extractor is None:
+            return None
+        return ExtractionPlan(kind, extractor, extractor.cost(size))
+
+
+extractor_registry = ExtractorRegistry()
+register_extractor = extractor_registry.register
+
+register_extractor(
+    Extractor(
+        "text", frozenset({"text"}), "text", _extract_text, _text_cost,
+        interruptible=False,
+    )
+)
+register_extractor(
+    Extractor(
+        "docx", frozenset({"docx"}), "docx", _extract_docx, _docx_cost,
+        interruptible=False,
+    )
+)
+register_extractor(
+    Extractor(
+        "pdf", frozenset({"pdf"}), "pdf", _extract_pdf, _pdf_cost,
+        resource="ocr", iter_batches=_pdf_batches, interruptible=False,
+    )
+)
+register_extractor(
+    Extractor(
+        "vision_ocr", frozenset({"png", "jpeg", "gif", "webp"}), "image",
+        _extract_image, _image_cost, resource="ocr",
+    )
+)
+register_extractor(
+    Extractor(
+        "whisper", frozenset({"wav", "mp3", "m4a", "ogg", "flac", "webm"}), "audio",
+        _extract_audio, _audio_cost, resource="transcription", iter_batches=_audio_batches,
+    )
+)
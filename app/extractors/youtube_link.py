@@ -1,11 +1,33 @@
-from typing import Optional
-from youtube_transcript_api import YouTubeTranscriptApi
+from typing import Callable, Dict, Optional
+import asyncio
 import re
 
+from cachetools import TTLCache
+
+from app.utils.config import YOUTUBE_CACHE_SIZE, YOUTUBE_CACHE_TTL_SECONDS
+
+# A fetcher takes a video id and returns the transcript text (or raises).
+TranscriptFetcher = Callable[[str], str]
+
+_URL_RE = re.compile(
+    r"(?:https?://)?(?:www\.|m\.)?(?:youtube\.com/(?:watch\?\S*v=|shorts/|embed/)|youtu\.be/)[A-Za-z0-9_-]{11}\S*"
+)
+
+_transcript_cache: TTLCache = TTLCache(
+    maxsize=YOUTUBE_CACHE_SIZE, ttl=YOUTUBE_CACHE_TTL_SECONDS
+)
+_inflight: Dict[str, "asyncio.Task[str]"] = {}
+
+
+class TranscriptUnavailable(Exception):
+    """No transcript could be fetched for a YouTube link."""
+
+
 def extract_video_id(url: str) -> Optional[str]:
     patterns = [
         r"v=([A-Za-z0-9_-]{11})",
         r"youtu\.be/([A-Za-z0-9_-]{11})",
+        r"youtube\.com/(?:shorts|embed)/([A-Za-z0-9_-]{11})",
     ]
     for p in patterns:
         m = re.search(p, url)
@@ -13,14 +35,93 @@ def extract_video_id(url: str) -> Optional[str]:
             return m.group(1)
     return None
 
-def fetch_youtube_transcript(url: str) -> str:
+
+def find_youtube_url(text: str) -> Optional[str]:
+    """Return the first YouTube link found in free text, if any."""
+    m = _URL_RE.search(text or "")
+    return m.group(0) if m else None
+
+
+def _default_fetcher(video_id: str) -> str:
+    # Imported lazily: youtube_transcript_api is only needed when a link shows up.
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    transcript = YouTubeTranscriptApi().fetch(video_id, languages=["en"])
+    return " ".join(snippet.text for snippet in transcript)
+
+
+_fetcher: TranscriptFetcher = _default_fetcher
+
+
+def set_transcript_fetcher(fetcher: Optional[TranscriptFetcher]) -> None:
+    """
+    Swap the function used to download transcripts (e.g. a local stand-in
+    in tests or benchmarks). Pass None to restore the network fetcher.
+    """
+    global _fetcher
+    _fetcher = fetcher or _default_fetcher
+
+
+def clear_transcript_cache() -> None:
+    _transcript_cache.clear()
+
+
+def _video_id(url: str) -> str:
     vid = extract_video_id(url)
     if not vid:
-        return "Could not detect YouTube video id."
+        raise TranscriptUnavailable("Could not detect YouTube video id.")
+    return vid
+
+
+def fetch_youtube_transcript(url: str) -> str:
+    """Transcript text of a YouTube link; raises TranscriptUnavailable."""
+    vid = _video_id(url)
+    cached = _transcript_cache.get(vid)
+    if cached is not None:
+        return cached
 
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(vid, languages=["en"])
-        text = " ".join([t["text"] for t in transcript])
-        return text
-    except Exception:
-        return "Transcript not available for this YouTube video."
+        text = _fetcher(vid)
+    except Exception as e:
+        raise TranscriptUnavailable("Transcript not available for this YouTube video.") from e
+    _transcript_cache[vid] = text
+    return text
+
+
+async def _fetch_into_cache(vid: str, fetch: TranscriptFetcher) -> str:
+    try:
+        text = await asyncio.to_thread(fetch, vid)
+    except Exception as e:
+        raise TranscriptUnavailable("Transcript not available for this YouTube video.") from e
+    _transcript_cache[vid] = text
+    return text
+
+
+def _fetch_done(vid: str, task: "asyncio.Task[str]") -> None:
+    if _inflight.get(vid) is task:
+        del _inflight[vid]
+    if not task.cancelled():
+        task.exception()  # retrieved here in case every waiter went away
+
+
+async def fetch_youtube_transcript_async(
+    url: str, fetcher: Optional[TranscriptFetcher] = None
+) -> str:
+    """
+    Non-blocking variant used by the graph. The (blocking) fetch runs in a
+    worker thread, results are cached per video id for YOUTUBE_CACHE_TTL_SECONDS,
+    and concurrent requests for the same video share a single fetch. That
+    fetch is its own task, so a waiter that is cancelled does not cancel it
+    for the others. Raises TranscriptUnavailable; failures are not cached.
+    """
+    vid = _video_id(url)
+    cached = _transcript_cache.get(vid)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(vid)
+    if task is None:
+        task = asyncio.create_task(_fetch_into_cache(vid, fetcher or _fetcher))
+        task.add_done_callback(lambda t: _fetch_done(vid, t))
+        _inflight[vid] = task
+    return await asyncio.shield(task)
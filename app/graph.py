@@ -1,15 +1,41 @@
+import asyncio
+import hashlib
+from typing import Optional
+
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from app.state import AgentState, Task
+from app.utils.admission import admission
+from app.utils.cancellation import cancellations, discard
+from app.utils.documents import Document, documents
+from app.utils.compaction import compact_text
+from app.utils.config import (
+    COMPACTION_DEDUPE_MIN_CHARS,
+    COMPACTION_ENABLED,
+    PROGRESSIVE_ENABLED,
+    PROGRESSIVE_MIN_BYTES,
+    PROGRESSIVE_MIN_SECONDS,
+    PROGRESSIVE_QA_TOP_K,
+    SEMANTIC_CACHE_ENABLED,
+)
+from app.utils.file_store import file_store
+from app.utils.progress import emit, listening
+from app.utils.semantic_cache import answer_cache
 from app.utils.llm import llm_json, chat_llm
-from app.extractors.image_ocr import extract_image_text_from_bytes
-from app.extractors.pdf_extractor import extract_pdf_text_from_bytes
-from app.extractors.audio_transcriber import transcribe_audio_bytes
-from app.tasks.summariser import summarize
+from app.utils.timing import timed_node
+from app.utils.tokens import count_tokens
+from app.extractors.progressive import ProgressiveExtraction, get_job, pop_job, start_job
+from app.extractors.registry import SNIFF_BYTES, ExtractionPlan, extractor_registry
+from app.extractors.youtube_link import (
+    TranscriptUnavailable,
+    fetch_youtube_transcript_async,
+    find_youtube_url,
+)
+from app.tasks.summariser import summarize, summarize_part
 from app.tasks.sentiment import analyze_sentiment
 from app.tasks.code_explainer import explain_code
-from app.tasks.qa import answer_question
+from app.tasks.qa import PassageRetriever, answer_question
 
 
 def _get_last_user_content(messages) -> str:
@@ -38,53 +64,303 @@ def start_node(state: AgentState) -> AgentState:
     return state
 
 
+def _keep_extraction(task: asyncio.Task, file_id: str) -> None:
+    """Done-callback: store an extraction whose request was cancelled meanwhile."""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.get_running_loop().run_in_executor(
+        None, file_store.put_extraction, file_id, task.result()
+    )
+    cancellations.record("extractions_kept")
+
+
+async def _extract_file(
+    file_bytes: bytes,
+    plan: ExtractionPlan,
+    file_name: str,
+    file_id: str,
+    logs: list,
+) -> str:
+    """
+    Run the registry's extractor for the sniffed kind. If the request is
+    cancelled, interruptible extractors (remote OCR / Whisper calls) are
+    aborted; thread-bound ones (pdfplumber, decoding) cannot be stopped, so
+    they are left to finish and their text is stored for the next request.
+    """
+    extractor = plan.extractor
+
+    async def run() -> str:
+        async with admission.resource(extractor.resource):
+            return await extractor.extract(file_bytes, file_name, plan.kind)
+
+    if extractor.interruptible:
+        text = await run()
+    else:
+        task = asyncio.create_task(run())
+        try:
+            text = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(lambda t: _keep_extraction(t, file_id))
+            raise
+    logs.append(
+        f"Extract node: {extractor.name} extracted {len(text)} chars from {plan.kind}."
+    )
+    return text
+
+
+async def _add_document(
+    thread_id: str, text: str, source_type: str, name: str, file_id: Optional[str] = None
+) -> Document:
+    """Register `text` on the thread; it is tokenized off the event loop."""
+    token_count = await asyncio.to_thread(count_tokens, text)
+    return documents.add(thread_id, text, source_type, name, file_id, token_count=token_count)
+
+
+def _start_progressive(
+    state: AgentState,
+    file_bytes: bytes,
+    plan: ExtractionPlan,
+    file_name: str,
+    file_id: str,
+) -> ProgressiveExtraction:
+    """
+    Extract a large PDF / audio file in batches. The document is registered
+    (and its extraction stored) only once the last batch is in.
+    """
+    thread_id = state.get("thread_id", "")
+    extractor = plan.extractor
+    source = extractor.iter_batches(file_bytes, file_name, plan.kind)
+
+    async def register(text: str):
+        await asyncio.to_thread(file_store.put_extraction, file_id, text)
+        return await _add_document(thread_id, text, extractor.source_type, file_name, file_id)
+
+    return start_job(source, extractor.resource, register)
+
+
+def _combine(state: AgentState, job_text: Optional[str], raw: bool = False) -> str:
+    doc_ids = state.get("active_doc_ids") or []
+    parts = []
+    if doc_ids:
+        parts.append(documents.joined_text(state.get("thread_id", ""), doc_ids, raw=raw))
+    if job_text:
+        parts.append(job_text)
+    if parts:
+        return "\n\n".join(parts)
+    return state.get("extracted_text", "")
+
+
+def _active_job(state: AgentState) -> Optional[ProgressiveExtraction]:
+    """The turn's progressive extraction, unless it was cancelled or failed."""
+    job = get_job(state.get("extraction_job"))
+    return job if job is not None and job.usable else None
+
+
+def _context_text(state: AgentState) -> str:
+    """
+    Text the tasks work on: the active registry documents, fetched lazily,
+    plus whatever a running progressive extraction has produced so far,
+    or the plain user message when no document is active.
+    """
+    job = _active_job(state)
+    return _combine(state, job.text_so_far if job else None)
+
+
+async def _document_text(state: AgentState, raw: bool = False) -> str:
+    """
+    Like _context_text, but waits for a progressive extraction to finish.
+    raw=True returns documents as extracted instead of compacted.
+    """
+    job = _active_job(state)
+    return _combine(state, await job.full_text() if job else None, raw=raw)
+
+
+async def _settle_job(state: AgentState, wait: bool) -> None:
+    """
+    Turn a finished progressive extraction into an active document. With
+    wait=False a job that is still running is left alone; it registers its
+    document when done and the next turn picks it up.
+    """
+    job_id = state.get("extraction_job")
+    if not job_id:
+        return
+    logs = state.get("logs", [])
+    job = get_job(job_id)
+    if job is not None and not job.done and not wait:
+        logs.append("Extraction continues in the background; next turn will use it.")
+        return
+
+    pop_job(job_id)
+    state["extraction_job"] = None
+    if job is None:
+        return
+    try:
+        await job.full_text()
+    except Exception as e:
+        # Cancelled (e.g. the client disconnected mid-extraction) or failed:
+        # drop the job; the file can be sent again.
+        logs.append(f"Progressive extraction dropped: {e}")
+        return
+    doc = job.result
+    active = list(state.get("active_doc_ids") or [])
+    if doc is not None and doc.doc_id not in active:
+        active.append(doc.doc_id)
+    state["active_doc_ids"] = active
+    state["extracted_text"] = ""
+    logs.append(f"Progressive extraction done ({len(job.batches)} batches).")
+
+
 async def extract_node(state: AgentState) -> AgentState:
     """
     Decide how to extract content:
-    - If file_bytes present: detect type and extract (image/pdf/audio).
-    - Else: use last user message as extracted_text.
+    - If a file is attached (file_id into the file store): reuse its stored
+      extraction, or detect type and extract (image/pdf/audio) once.
+    - Else if the message contains a YouTube link: fetch its transcript.
+    New documents go into the per-thread registry; the state only keeps
+    their ids (active_doc_ids). doc_selector ("all", ids, names) picks
+    earlier documents. With no active document, the last user message
+    is used as extracted_text.
     """
     logs = state.get("logs", [])
     logs.append("Extract node: deciding how to extract content.")
     state["logs"] = logs
 
-    file_bytes = state.get("file_bytes")
-    file_name = (state.get("file_name") or "").lower()
-    file_type = (state.get("file_content_type") or "").lower()
+    # A large file from the previous turn may still be extracting.
+    await _settle_job(state, wait=True)
 
-    # Case 1: File attached -> do extraction
-    if file_bytes:
-        if "image" in file_type or file_name.endswith((".png", ".jpg", ".jpeg")):
-            text, _ = extract_image_text_from_bytes(file_bytes)
-            state["extracted_text"] = text
-            logs.append(f"Extract node: extracted text from image ({len(text)} chars).")
-
-        elif "pdf" in file_type or file_name.endswith(".pdf"):
-            text, _ = extract_pdf_text_from_bytes(file_bytes)
-            state["extracted_text"] = text
-            logs.append(f"Extract node: extracted text from PDF ({len(text)} chars).")
-
-        elif "audio" in file_type or file_name.endswith((".mp3", ".wav", ".m4a")):
-            text, dur = transcribe_audio_bytes(file_bytes, file_name or "audio")
-            state["extracted_text"] = text
+    thread_id = state.get("thread_id", "")
+    file_id = state.get("file_id")
+    file_name = state.get("file_name") or ""
+    file_type = (state.get("file_content_type") or "").lower()
+    new_doc = None
+    job: Optional[ProgressiveExtraction] = None
+    unavailable: Optional[str] = None
+
+    # Case 1: File attached -> reuse the stored extraction or extract once
+    if file_id:
+        head, size = await asyncio.to_thread(file_store.read_head, file_id, SNIFF_BYTES)
+        plan = extractor_registry.plan(head, size, file_name, file_type)
+        cached = await asyncio.to_thread(file_store.get_extraction, file_id)
+        text: Optional[str] = None
+        if cached is not None:
+            text = cached
             logs.append(
-                f"Extract node: transcribed audio ({len(text)} chars, duration ~{dur:.1f}s)."
+                f"Extract node: reused stored extraction for {file_name or file_id[:12]} "
+                f"({len(cached)} chars)."
             )
-        else:
+        elif plan is None:
             logs.append("Extract node: unknown file type, fallback to text-only.")
-
-        state["file_bytes"] = None
-
-    if not state.get("extracted_text"):
+        else:
+            logs.append(
+                f"Extract node: detected {plan.kind}, using {plan.extractor.name} "
+                f"(estimated ~{plan.estimated_seconds:.1f}s)."
+            )
+            file_bytes = await asyncio.to_thread(file_store.read_bytes, file_id) or b""
+            if (
+                PROGRESSIVE_ENABLED
+                and plan.extractor.iter_batches is not None
+                and (
+                    size >= PROGRESSIVE_MIN_BYTES
+                    or plan.estimated_seconds >= PROGRESSIVE_MIN_SECONDS
+                )
+            ):
+                job = _start_progressive(state, file_bytes, plan, file_name, file_id)
+            else:
+                text = await _extract_file(file_bytes, plan, file_name, file_id, logs)
+                await asyncio.to_thread(file_store.put_extraction, file_id, text)
+
+        if text is not None:
+            source_type = plan.extractor.source_type if plan else "unknown"
+            new_doc = await _add_document(thread_id, text, source_type, file_name, file_id)
+
+    # Case 2: No file, but the message links a YouTube video -> fetch transcript
+    else:
+        last_user = _get_last_user_content(state.get("messages", []))
+        url = find_youtube_url(last_user)
+        if url:
+            try:
+                text = await fetch_youtube_transcript_async(url)
+            except TranscriptUnavailable as e:
+                # Nothing is registered; the message goes on with a note.
+                unavailable = str(e)
+                logs.append(f"Extract node: {unavailable}")
+            else:
+                new_doc = await _add_document(thread_id, text, "youtube", url)
+                logs.append(
+                    f"Extract node: fetched YouTube transcript ({len(text)} chars)."
+                )
+
+    # Which documents does this turn work on?
+    selector = state.get("doc_selector")
+    if selector:
+        active = [d.doc_id for d in documents.resolve(thread_id, selector)]
+        logs.append(f"Extract node: selected {len(active)} document(s) via '{selector}'.")
+    elif new_doc is not None or job is not None:
+        active = []
+    else:
+        active = [i for i in state.get("active_doc_ids") or [] if documents.get(thread_id, i)]
+    if new_doc is not None and new_doc.doc_id not in active:
+        active.append(new_doc.doc_id)
+    state["active_doc_ids"] = active
+
+    if job is not None:
+        # Planning and the incremental tasks start on the first batch while
+        # the rest of the document is still being extracted.
+        state["extraction_job"] = job.job_id
+        state["extracted_text"] = ""
+        first = await job.first_batch()
+        logs.append(
+            f"Extract node: progressive {plan.kind} extraction started "
+            f"(first batch {len(first)} chars)."
+        )
+    elif active:
+        # Text stays in the registry; nodes read it lazily via _context_text.
+        state["extracted_text"] = ""
+        logs.append(f"Extract node: using {len(active)} registered document(s).")
+    else:
         messages = state.get("messages", [])
         last_user = _get_last_user_content(messages)
-        state["extracted_text"] = last_user
+        state["extracted_text"] = f"{last_user}\n\n({unavailable})" if unavailable else last_user
         logs.append("Extract node: using last user message as extracted_text.")
 
     state["logs"] = logs
     return state
 
 
+# Plain-text uploads (code, CSV, Markdown) are used exactly as written.
+_VERBATIM_SOURCES = ("text",)
+
+
+async def compact_node(state: AgentState) -> AgentState:
+    """
+    Normalize newly extracted documents before any prompt sees them:
+    page headers/footers, whitespace runs, hyphenation breaks and duplicate
+    lines are removed (app/utils/compaction.py). Runs once per document;
+    the registry keeps an offset map back to the original extraction.
+    """
+    if not COMPACTION_ENABLED:
+        return state
+    logs = state.get("logs", [])
+    thread_id = state.get("thread_id", "")
+    for doc_id in state.get("active_doc_ids") or []:
+        doc = documents.get(thread_id, doc_id)
+        if doc is None or doc.compacted or doc.source_type in _VERBATIM_SOURCES:
+            continue
+        compaction = documents.compaction(doc)
+        if compaction is None:
+            compaction = await asyncio.to_thread(
+                compact_text, documents.text(doc), COMPACTION_DEDUPE_MIN_CHARS
+            )
+        documents.apply_compaction(doc, compaction)
+        logs.append(
+            f"Compact node: {doc.name} {compaction.raw_tokens} -> {compaction.tokens} tokens "
+            f"(saved {compaction.tokens_saved}; {compaction.furniture_lines} header/footer, "
+            f"{compaction.duplicate_lines} duplicate lines, {compaction.joined_words} rejoined words)."
+        )
+    state["logs"] = logs
+    return state
+
+
 async def planner_node(state: AgentState) -> AgentState:
     """
     Look at the latest user message and decide:
@@ -98,7 +374,7 @@ async def planner_node(state: AgentState) -> AgentState:
     messages = state.get("messages", [])
     last_user = _get_last_user_content(messages)
 
-    extracted = state.get("extracted_text", "")
+    extracted = _context_text(state)
 
     prompt = f"""
 You are the PLANNER for an AI assistant.
@@ -251,9 +527,57 @@ def clarification_node(state: AgentState) -> AgentState:
     return state
 
 
+async def _compacted_batches(job: ProgressiveExtraction):
+    """Batches of a running extraction, compacted one by one for prompts."""
+    async for batch in job.iter_batches():
+        if COMPACTION_ENABLED:
+            batch = (
+                await asyncio.to_thread(compact_text, batch, COMPACTION_DEDUPE_MIN_CHARS)
+            ).text
+        yield batch
+
+
+async def _progressive_summary(job: ProgressiveExtraction) -> str:
+    """
+    Map-reduce over batches as they arrive: each batch is condensed (and
+    streamed as a partial) while later pages are still being extracted.
+    """
+    batches, parts = [], []
+
+    async def condense(text: str, part: int) -> str:
+        out = await summarize_part(text, part)
+        emit("summary", out, part=part)
+        return out
+
+    cancelled = False
+    try:
+        async for batch in _compacted_batches(job):
+            batches.append(batch)
+            if len(batches) == 2:
+                parts.append(asyncio.create_task(condense(batches[0], 1)))
+            if len(batches) >= 2:
+                parts.append(asyncio.create_task(condense(batch, len(batches))))
+        if len(batches) < 2:
+            return await summarize("".join(batches))
+        notes = await asyncio.gather(*parts)
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        for t in parts:
+            if cancelled:
+                t.cancel()
+            elif not t.done():
+                discard(t)
+    return await summarize("\n\n".join(notes))
+
+
 async def summary_node(state: AgentState) -> AgentState:
-    text = state.get("extracted_text", "")
-    out = await summarize(text)
+    job = _active_job(state)
+    if job is not None and not state.get("active_doc_ids"):
+        out = await _progressive_summary(job)
+    else:
+        out = await summarize(await _document_text(state))
     state["final_result"] = out
     logs = state.get("logs", [])
     logs.append("Summary node: generated multi-format summary.")
@@ -262,7 +586,7 @@ async def summary_node(state: AgentState) -> AgentState:
 
 
 async def sentiment_node(state: AgentState) -> AgentState:
-    text = state.get("extracted_text", "")
+    text = await _document_text(state)
     out = await analyze_sentiment(text)
     state["final_result"] = out
     logs = state.get("logs", [])
@@ -272,7 +596,7 @@ async def sentiment_node(state: AgentState) -> AgentState:
 
 
 async def code_explainer_node(state: AgentState) -> AgentState:
-    text = state.get("extracted_text", "")
+    text = await _document_text(state)
     out = await explain_code(text)
     state["final_result"] = out
     logs = state.get("logs", [])
@@ -281,11 +605,91 @@ async def code_explainer_node(state: AgentState) -> AgentState:
     return state
 
 
+def _cache_scope(state: AgentState, task: str) -> str:
+    """
+    Semantic-cache scope: the task plus the hashes of the active documents,
+    so answers are shared only between people asking about the same content.
+    Without documents the scope is the thread, never a global bucket.
+    """
+    thread_id = state.get("thread_id", "")
+    hashes = sorted(
+        d.sha256
+        for d in (documents.get(thread_id, i) for i in state.get("active_doc_ids") or [])
+        if d
+    )
+    key = "|".join(hashes) if hashes else f"thread:{thread_id}"
+    return f"{task}:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+async def _cached_answer(state: AgentState, task: str, question: str, compute) -> str:
+    """
+    Serve `question` from the semantic answer cache when a near-identical
+    one was already answered in the same scope; otherwise compute and store.
+    """
+    logs = state.get("logs", [])
+    if not SEMANTIC_CACHE_ENABLED or not question.strip():
+        return await compute()
+
+    scope = _cache_scope(state, task)
+    found = await answer_cache.lookup(scope, question)
+    if found.hit:
+        state["cache_hit"] = True
+        logs.append(f"Semantic cache: hit (similarity {found.similarity:.2f}).")
+        return found.answer
+
+    out = await compute()
+    answer_cache.store(scope, question, out, found.embedding)
+    return out
+
+
+async def _progressive_answer(state: AgentState, job: ProgressiveExtraction, question: str) -> str:
+    """
+    QA while a document is still being extracted: passages are scored as
+    batches arrive; a streaming client gets an early answer from the first
+    batch, the final answer uses the best passages of the whole document.
+    """
+    retriever = PassageRetriever(question, top_k=PROGRESSIVE_QA_TOP_K)
+    early: Optional[asyncio.Task] = None
+
+    async def answer_early() -> None:
+        emit("qa", await answer_question(retriever.context(), question), early=True)
+
+    cancelled = False
+    try:
+        async for batch in _compacted_batches(job):
+            await retriever.add(batch)
+            if early is None and listening():
+                early = asyncio.create_task(answer_early())
+        doc_ids = state.get("active_doc_ids")
+        if doc_ids:
+            await retriever.add(documents.joined_text(state.get("thread_id", ""), doc_ids))
+        return await answer_question(retriever.context(), question)
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if early is not None and not early.done():
+            if cancelled:
+                early.cancel()
+            else:  # superseded by the final answer
+                discard(early)
+
+
 async def qa_node(state: AgentState) -> AgentState:
-    text = state.get("extracted_text", "")
     messages = state.get("messages", [])
     last_user = _get_last_user_content(messages)
-    out = await answer_question(text, last_user)
+    job = _active_job(state)
+    if job is not None:
+        # The document has no hash yet, so there is no cache scope for it.
+        out = await _progressive_answer(state, job, last_user)
+    elif state.get("active_doc_ids"):
+        text = _context_text(state)
+        out = await _cached_answer(
+            state, "qa", last_user, lambda: answer_question(text, last_user)
+        )
+    else:
+        # The question carries its own context; nothing reusable to cache.
+        out = await answer_question(_context_text(state), last_user)
     state["final_result"] = out
     logs = state.get("logs", [])
     logs.append("QA node: answered question based on context.")
@@ -294,6 +698,8 @@ async def qa_node(state: AgentState) -> AgentState:
 
 
 async def conversation_node(state: AgentState) -> AgentState:
+    # Not cached: there is no document to scope a shared answer to, and a
+    # reply depends on the thread's history.
     messages = state.get("messages", [])
     out = await chat_llm(messages)
     state["final_result"] = out
@@ -303,8 +709,14 @@ async def conversation_node(state: AgentState) -> AgentState:
     return state
 
 
-def transcript_only_node(state: AgentState) -> AgentState:
-    text = state.get("extracted_text", "")
+async def transcript_only_node(state: AgentState) -> AgentState:
+    job = _active_job(state)
+    if job is not None:
+        part = 0
+        async for batch in job.iter_batches():
+            part += 1
+            emit("transcript_only", batch, part=part)
+    text = await _document_text(state, raw=True)
     state["final_result"] = text
     logs = state.get("logs", [])
     logs.append("Transcript-only node: returning transcript as-is.")
@@ -312,7 +724,8 @@ def transcript_only_node(state: AgentState) -> AgentState:
     return state
 
 
-def finalize_node(state: AgentState) -> AgentState:
+async def finalize_node(state: AgentState) -> AgentState:
+    await _settle_job(state, wait=False)
     logs = state.get("logs", [])
     logs.append("Finalize node: done.")
     state["logs"] = logs
@@ -343,58 +756,67 @@ def route_after_planner(state: AgentState) -> str:
 
 # ---------- Build graph with checkpointing ----------
 
-workflow = StateGraph(AgentState)
-
-workflow.add_node("start", start_node)
-workflow.add_node("extract", extract_node)
-workflow.add_node("planner", planner_node)
-workflow.add_node("clarification", clarification_node)
-
-workflow.add_node("summary", summary_node)
-workflow.add_node("sentiment", sentiment_node)
-workflow.add_node("code_explainer", code_explainer_node)
-workflow.add_node("qa", qa_node)
-workflow.add_node("conversation", conversation_node)
-workflow.add_node("transcript_only", transcript_only_node)
-
-workflow.add_node("finalize", finalize_node)
-
-workflow.add_edge(START, "start")
-workflow.add_edge("start", "extract")
-workflow.add_edge("extract", "planner")
-
-workflow.add_conditional_edges(
-    "planner",
-    route_after_planner,
-    {
-        "clarification": "clarification",
-        "summary": "summary",
-        "sentiment": "sentiment",
-        "code_explainer": "code_explainer",
-        "qa": "qa",
-        "conversation": "conversation",
-        "transcript_only": "transcript_only",
-    },
-)
 
-for node in [
-    "summary",
-    "sentiment",
-    "code_explainer",
-    "qa",
-    "conversation",
-    "transcript_only",
-]:
-    workflow.add_edge(node, "finalize")
+def build_agent_app(checkpointer=None):
+    """
+    Build and compile the agent graph. Called once at app startup (see the
+    lifespan in app/main.py) rather than at import time, so importing the
+    package stays cheap.
+    """
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("start", timed_node("start", start_node))
+    workflow.add_node("extract", timed_node("extract", extract_node))
+    workflow.add_node("compact", timed_node("compact", compact_node))
+    workflow.add_node("planner", timed_node("planner", planner_node))
+    workflow.add_node("clarification", timed_node("clarification", clarification_node))
+
+    workflow.add_node("summary", timed_node("summary", summary_node))
+    workflow.add_node("sentiment", timed_node("sentiment", sentiment_node))
+    workflow.add_node("code_explainer", timed_node("code_explainer", code_explainer_node))
+    workflow.add_node("qa", timed_node("qa", qa_node))
+    workflow.add_node("conversation", timed_node("conversation", conversation_node))
+    workflow.add_node("transcript_only", timed_node("transcript_only", transcript_only_node))
+
+    workflow.add_node("finalize", timed_node("finalize", finalize_node))
+
+    workflow.add_edge(START, "start")
+    workflow.add_edge("start", "extract")
+    workflow.add_edge("extract", "compact")
+    workflow.add_edge("compact", "planner")
+
+    workflow.add_conditional_edges(
+        "planner",
+        route_after_planner,
+        {
+            "clarification": "clarification",
+            "summary": "summary",
+            "sentiment": "sentiment",
+            "code_explainer": "code_explainer",
+            "qa": "qa",
+            "conversation": "conversation",
+            "transcript_only": "transcript_only",
+        },
+    )
+
+    for node in [
+        "summary",
+        "sentiment",
+        "code_explainer",
+        "qa",
+        "conversation",
+        "transcript_only",
+    ]:
+        workflow.add_edge(node, "finalize")
+
+    workflow.add_edge("clarification", END)
+    workflow.add_edge("finalize", END)
 
-workflow.add_edge("clarification", END)
-workflow.add_edge("finalize", END)
+    return workflow.compile(checkpointer=checkpointer or MemorySaver())
 
-checkpointer = MemorySaver()
-agent_app = workflow.compile(checkpointer=checkpointer)
 
-# png_data = agent_app.get_graph().draw_mermaid_png()
+# png_data = build_agent_app().get_graph().draw_mermaid_png()
 # with open("graph.png","wb") as f:
 #     f.write(png_data)
 
-# print("Graph saved as png")
\ No newline at end of file
+# print("Graph saved as png")
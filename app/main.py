@@ -1,12 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, Form
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import TYPE_CHECKING, List, Optional
 
-from app.models import ChatResponse, Plan
-from app.state import AgentState
-from app.graph import agent_app
+from app.models import ChatResponse, DocumentInfo, FileUploadResponse, ModelCall, Plan
+from app.utils.admission import admission, AdmissionRejected, QueueFull
+from app.utils.cancellation import TurnScope, cancellations, enter_turn, exit_turn
+from app.utils.compaction import compaction_stats
+from app.utils.config import DISCONNECT_POLL_SECONDS, MAX_UPLOAD_BYTES, REQUEST_DEADLINE_SECONDS
+from app.utils.documents import documents
+from app.utils.file_store import StoredFile, file_store
+from app.utils.progress import close_channel, open_channel
+from app.utils.resilience import (
+    CircuitOpenError,
+    reset_request_deadline,
+    resilience_snapshot,
+    set_request_deadline,
+)
+from app.utils.router import get_model_trace, reset_model_trace, start_model_trace
+
+if TYPE_CHECKING:
+    from app.state import AgentState
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the graph once per worker at startup instead of at import time."""
+    from app.graph import build_agent_app
+
+    app.state.agent_app = build_agent_app()
+    yield
 
-app = FastAPI(title="DataSmith Agent (Extraction by Agent)")
+
+app = FastAPI(title="DataSmith Agent (Extraction by Agent)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,48 +45,165 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat_endpoint(
-    text: Optional[str] = Form(None),
-    thread_id: str = Form("default-thread"),
-    file: Optional[UploadFile] = File(None),
-):
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+async def _store_upload(file: UploadFile) -> StoredFile:
+    # Read in chunks so an oversized upload is refused without buffering it.
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large.")
+    chunks, total = [], 0
+    while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+        total += len(chunk)
+        if total > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File too large.")
+        chunks.append(chunk)
+    return await asyncio.to_thread(
+        file_store.put, b"".join(chunks), file.filename or "", file.content_type or ""
+    )
+
+
+@app.post("/api/files", response_model=FileUploadResponse)
+async def upload_endpoint(file: UploadFile = File(...)):
     """
-    Main endpoint:
-    - If file present: pass its bytes + metadata into state.
-    - Agent (graph) decides how to extract (image/pdf/audio or pure text).
-    - LangGraph checkpointing keeps conversation memory per thread_id.
+    Store a file once and return its content-addressed file_id. Later
+    /api/chat calls pass file_id instead of re-sending the bytes.
     """
+    stored = await _store_upload(file)
+    return FileUploadResponse(**asdict(stored))
+
+
+async def _prepare_state(
+    text: Optional[str],
+    thread_id: str,
+    file: Optional[UploadFile],
+    file_id: Optional[str],
+    doc_ids: Optional[str],
+) -> "AgentState":
     logs = []
 
+    missing = documents.unresolved(thread_id, doc_ids)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                f"No document on this thread matches doc_ids {', '.join(missing)}; "
+                f"see /api/threads/{thread_id}/documents."
+            ),
+        )
+
     messages = []
     if text:
         messages.append({"role": "user", "content": text})
     else:
         messages.append({"role": "user", "content": ""})
 
-    file_bytes: Optional[bytes] = None
-    file_name: Optional[str] = None
-    file_content_type: Optional[str] = None
+    stored: Optional[StoredFile] = None
 
     if file:
-        file_bytes = await file.read()
-        file_name = file.filename
-        file_content_type = file.content_type or ""
-        logs.append(f"FastAPI: received file {file_name} ({file_content_type}).")
+        stored = await _store_upload(file)
+        logs.append(f"FastAPI: received file {stored.file_name} ({stored.content_type}).")
+    elif file_id:
+        stored = await asyncio.to_thread(file_store.get_meta, file_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Unknown file_id.")
+        logs.append(f"FastAPI: using stored file {stored.file_name} ({stored.content_type}).")
 
-    state: AgentState = {
+    return {
         "messages": messages,
+        "thread_id": thread_id,
+        "doc_selector": doc_ids,
         "logs": logs,
-        "file_bytes": file_bytes,
-        "file_name": file_name,
-        "file_content_type": file_content_type,
+        "node_timings": {},
+        "cache_hit": False,
+        "file_id": stored.file_id if stored else None,
+        "file_name": stored.file_name if stored else None,
+        "file_content_type": stored.content_type if stored else None,
     }
 
+
+async def _invoke(app: FastAPI, state: "AgentState"):
+    """Run one graph turn under admission control; returns (final_state, model_calls)."""
+    thread_id = state["thread_id"]
     config = {"configurable": {"thread_id": thread_id}}
-    final_state = await agent_app.ainvoke(state, config=config)
+    try:
+        async with admission.admit(thread_id):
+            deadline = set_request_deadline(REQUEST_DEADLINE_SECONDS)
+            trace = start_model_trace()
+            try:
+                final_state = await app.state.agent_app.ainvoke(state, config=config)
+                return final_state, [ModelCall(**c) for c in get_model_trace()]
+            finally:
+                reset_model_trace(trace)
+                reset_request_deadline(deadline)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429 if isinstance(e, QueueFull) else 503,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Upstream model is unavailable, try again shortly.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
+    except asyncio.TimeoutError:
+        # REQUEST_DEADLINE_SECONDS ran out (primary and fallback models included).
+        raise HTTPException(
+            status_code=504,
+            detail="The request took too long, try again shortly.",
+            headers={"Retry-After": str(admission.retry_after())},
+        )
+
 
-    final_extracted = final_state.get("extracted_text", "")
+async def _watch_disconnect(request: Request, turn: asyncio.Task) -> bool:
+    """Cancel `turn` if the client disconnects before it finishes."""
+    while not turn.done():
+        if await request.is_disconnected():
+            turn.cancel()
+            return True
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+    return False
+
+
+async def _run_turn(
+    app: FastAPI, state: "AgentState", request: Optional[Request] = None
+) -> ChatResponse:
+    """
+    Run a turn and build the response. With `request`, a client disconnect
+    cancels the graph run (and, through it, in-flight LLM / OCR /
+    transcription calls); cancelling the caller does the same.
+    """
+    thread_id = state["thread_id"]
+    scope = TurnScope()
+    token = enter_turn(scope)
+    try:
+        turn = asyncio.create_task(_invoke(app, state))
+    finally:
+        exit_turn(token)
+    watcher = asyncio.create_task(_watch_disconnect(request, turn)) if request else None
+
+    try:
+        final_state, model_calls = await turn
+    except asyncio.CancelledError:
+        turn.cancel()
+        scope.cancel()
+        cancellations.record("requests")
+        if watcher is not None and watcher.done() and not watcher.cancelled() and watcher.result():
+            # Nobody is listening; the status only shows up in access logs.
+            raise HTTPException(status_code=499, detail="Client closed request.")
+        raise
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+    active_ids = final_state.get("active_doc_ids") or []
+    final_extracted = (
+        documents.joined_text(thread_id, active_ids, raw=True)
+        if active_ids
+        else final_state.get("extracted_text", "")
+    )
     final_logs = final_state.get("logs", [])
     task = final_state.get("task", "none")
     needs_clar = final_state.get("needs_clarification", False)
@@ -74,5 +221,126 @@ async def chat_endpoint(
         extracted_text=final_extracted,
         plan=plan,
         result=result,
+        cached=final_state.get("cache_hit", False),
         logs=final_logs,
+        timings=final_state.get("node_timings", {}),
+        model_calls=model_calls,
+        documents=_document_infos(thread_id, active_ids),
     )
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat_endpoint(
+    request: Request,
+    text: Optional[str] = Form(None),
+    thread_id: str = Form("default-thread"),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
+    doc_ids: Optional[str] = Form(None),
+):
+    """
+    Main endpoint:
+    - File given as upload or as file_id (from /api/files): pass its id +
+      metadata into state; the bytes stay in the file store.
+    - Agent (graph) decides how to extract (image/pdf/audio or pure text).
+    - Extracted documents are kept per thread; doc_ids ("all", or comma
+      separated ids/names) targets earlier ones without re-extracting; ids
+      or names that match no document are a 404.
+    - LangGraph checkpointing keeps conversation memory per thread_id.
+    - Admission control: turns on one thread_id run in order; when the wait
+      queue is full we answer 429 with Retry-After instead of piling up.
+    """
+    state = await _prepare_state(text, thread_id, file, file_id, doc_ids)
+    return await _run_turn(request.app, state, request)
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(
+    request: Request,
+    text: Optional[str] = Form(None),
+    thread_id: str = Form("default-thread"),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
+    doc_ids: Optional[str] = Form(None),
+):
+    """
+    Same turn as /api/chat, streamed as NDJSON. For large PDFs / audio the
+    graph emits {"type": "partial", ...} lines (per-part summaries, an early
+    QA answer, transcript batches) while extraction is still running; the
+    last line is {"type": "final", "response": ChatResponse} or
+    {"type": "error", "status": ..., "detail": ...}.
+    """
+    state = await _prepare_state(text, thread_id, file, file_id, doc_ids)
+
+    async def events():
+        token, queue = open_channel()
+        try:
+            # The task copies the current context, channel included.
+            turn = asyncio.create_task(_run_turn(request.app, state))
+        finally:
+            close_channel(token)
+
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, turn}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter not in done:
+                    getter.cancel()
+                    break
+                yield json.dumps(getter.result()) + "\n"
+            while not queue.empty():
+                yield json.dumps(queue.get_nowait()) + "\n"
+
+            try:
+                response = turn.result()
+            except HTTPException as e:
+                event = {"type": "error", "status": e.status_code, "detail": e.detail}
+            except Exception as e:
+                event = {"type": "error", "status": 500, "detail": str(e)}
+            else:
+                event = {"type": "final", "response": response.model_dump()}
+            yield json.dumps(event) + "\n"
+        finally:
+            if not turn.done():
+                turn.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _document_infos(thread_id: str, active_ids: List[str]) -> List[DocumentInfo]:
+    return [
+        DocumentInfo(
+            doc_id=d.doc_id,
+            name=d.name,
+            source_type=d.source_type,
+            sha256=d.sha256,
+            chars=d.chars,
+            token_count=d.token_count,
+            tokens_saved=d.tokens_saved,
+            active=d.doc_id in active_ids,
+        )
+        for d in documents.list(thread_id)
+    ]
+
+
+@app.get("/api/threads/{thread_id}/documents", response_model=List[DocumentInfo])
+async def list_documents_endpoint(thread_id: str):
+    """Documents registered on a thread (ids to pass back as doc_ids)."""
+    return _document_infos(thread_id, [])
+
+
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Queue depth, wait times and resource usage, for capacity sizing."""
+    from app.utils.semantic_cache import answer_cache  # numpy; loaded with the graph
+
+    return {
+        "admission": admission.snapshot(),
+        "upstream": resilience_snapshot(),
+        "answer_cache": answer_cache.snapshot(),
+        "compaction": compaction_stats.snapshot(),
+        "cancellations": cancellations.snapshot(),
+        "uploads": {"evicted": file_store.evicted},
+    }
@@ -1,6 +1,6 @@
 # app/models.py
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 
 class Message(BaseModel):
     role: Literal["user", "assistant", "system"]
@@ -13,7 +13,7 @@ class ChatRequest(BaseModel):
 
 class ExtractionResult(BaseModel):
     text: str
-    source_type: Literal["text", "image", "pdf", "audio", "youtube", "unknown"]
+    source_type: Literal["text", "docx", "image", "pdf", "audio", "youtube", "unknown"]
     ocr_confidence: Optional[float] = None
     duration_seconds: Optional[float] = None
 
@@ -23,8 +23,34 @@ class Plan(BaseModel):
     clarification_question: Optional[str] = None
     reasoning: Optional[str] = None
 
+class DocumentInfo(BaseModel):
+    doc_id: str
+    name: str
+    source_type: str
+    sha256: str
+    chars: int
+    token_count: int
+    tokens_saved: int = 0
+    active: bool = False
+
+class ModelCall(BaseModel):
+    step: str
+    model: str
+    latency_ms: float
+    fallback: bool = False
+
 class ChatResponse(BaseModel):
     extracted_text: str
     plan: Plan
     result: Optional[str] = None
+    cached: bool = False
     logs: List[str] = []
+    timings: Dict[str, float] = {}
+    model_calls: List[ModelCall] = []
+    documents: List[DocumentInfo] = []
+
+class FileUploadResponse(BaseModel):
+    file_id: str
+    file_name: str
+    content_type: str
+    size: int
@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal, Annotated
+from typing import Dict, List, Optional, Literal, Annotated
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 
@@ -14,17 +14,27 @@ Task = Literal[
 
 class AgentState(TypedDict, total=False):
     messages: Annotated[list, add_messages]
+    thread_id: str
 
+    # Only the plain user message; document text lives in the registry
+    # (app/utils/documents.py) and is referenced by id.
     extracted_text: str
+    active_doc_ids: List[str]
+    doc_selector: Optional[str]
+    # Id of a progressive extraction still running for this turn
+    # (app/extractors/progressive.py); settled in finalize.
+    extraction_job: Optional[str]
 
     task: Task
     needs_clarification: bool
     clarification_question: Optional[str]
 
     final_result: str
+    cache_hit: bool
 
     logs: List[str]
+    node_timings: Dict[str, float]
 
-    file_bytes: Optional[bytes]
+    file_id: Optional[str]
     file_name: Optional[str]
     file_content_type: Optional[str]
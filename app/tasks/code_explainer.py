@@ -15,4 +15,4 @@ Code:
 {code}
 ```
 """
-    return await chat_llm([{"role": "user", "content": prompt}])
\ No newline at end of file
+    return await chat_llm([{"role": "user", "content": prompt}], step="code_explainer")
\ No newline at end of file
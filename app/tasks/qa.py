@@ -1,3 +1,6 @@
+import asyncio
+from typing import List, Tuple
+
 from app.utils.llm import chat_llm
 
 async def answer_question(context: str, question: str) -> str:
@@ -12,4 +15,58 @@ Question:
 
 Answer based only on the context. If you don't know, say you don't know.
 """
-    return await chat_llm([{"role": "user", "content": prompt}])
+    return await chat_llm([{"role": "user", "content": prompt}], step="qa")
+
+
+def split_passages(text: str, max_chars: int = 2000) -> List[str]:
+    """Cut text into paragraph-aligned passages of at most ~max_chars."""
+    passages, current = [], ""
+    for para in text.split("\n"):
+        if current and len(current) + len(para) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n{para}" if current else para
+        while len(current) > max_chars:
+            passages.append(current[:max_chars])
+            current = current[max_chars:]
+    if current.strip():
+        passages.append(current)
+    return passages
+
+
+class PassageRetriever:
+    """
+    Incremental retrieval for QA over documents that are still being
+    extracted: score passages against the question as batches arrive and
+    keep the best `top_k` (returned in document order).
+    """
+
+    def __init__(self, question: str, top_k: int = 6):
+        from app.utils.semantic_cache import HashingEmbedder
+
+        self._embedder = HashingEmbedder()
+        self._question = question
+        self._q = None
+        self.top_k = top_k
+        self._scored: List[Tuple[float, int, str]] = []
+
+    async def add(self, text: str) -> float:
+        """Score a new batch; returns the best passage similarity in it."""
+        # Embedding a few hundred pages takes seconds: keep it off the event loop.
+        scored = await asyncio.to_thread(self._score, text)
+        for score, passage in scored:
+            self._scored.append((score, len(self._scored), passage))
+        self._scored = sorted(self._scored, reverse=True)[: self.top_k * 4]
+        return max((score for score, _ in scored), default=0.0)
+
+    def _score(self, text: str) -> List[Tuple[float, str]]:
+        if self._q is None:
+            self._q = self._embedder.vector(self._question)
+        return [
+            (float(self._embedder.vector(passage) @ self._q), passage)
+            for passage in split_passages(text)
+        ]
+
+    def context(self) -> str:
+        top = sorted(sorted(self._scored, reverse=True)[: self.top_k], key=lambda s: s[1])
+        return "\n\n".join(p for _, _, p in top)
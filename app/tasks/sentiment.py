@@ -12,4 +12,6 @@ Return:
 Text:
 {text}
 """
-    return await chat_llm([{"role": "user", "content": prompt}])
+    return await chat_llm(
+        [{"role": "user", "content": prompt}], step="sentiment", hedge=True
+    )
@@ -14,5 +14,19 @@ Summarize the following text in three formats:
 Text:
 {text}
 """
-    content = await chat_llm([{"role": "user", "content": prompt}])
+    content = await chat_llm([{"role": "user", "content": prompt}], step="summary")
     return content
+
+
+async def summarize_part(text: str, part: int) -> str:
+    """Map phase for long documents: condense one batch of pages/segments."""
+    prompt = f"""
+You are summarizing part {part} of a longer document.
+
+Write 3-5 short bullet points with the key facts, decisions and numbers in this part.
+Do not add an introduction.
+
+Text:
+{text}
+"""
+    return await chat_llm([{"role": "user", "content": prompt}], step="summary")
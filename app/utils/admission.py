@@ -0,0 +1,228 @@
+# app/utils/admission.py
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List
+
+from .config import (
+    LLM_CONCURRENCY,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_QUEUED_REQUESTS,
+    OCR_CONCURRENCY,
+    QUEUE_TIMEOUT_SECONDS,
+    TRANSCRIPTION_CONCURRENCY,
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class QueueFull(AdmissionRejected):
+    pass
+
+
+class QueueTimeout(AdmissionRejected):
+    pass
+
+
+class _WaitStats:
+    """Rolling wait-time stats (seconds) over the last `window` samples."""
+
+    def __init__(self, window: int = 512):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.total = 0
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.total += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": self.total, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self._samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            "count": self.total,
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+            "p95_ms": round(1000 * p95, 2),
+            "max_ms": round(1000 * ordered[-1], 2),
+        }
+
+
+class _Resource:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sem = asyncio.Semaphore(limit)
+        self.in_use = 0
+        self.waiting = 0
+        self.wait = _WaitStats()
+
+
+class AdmissionController:
+    """
+    Front door for /api/chat:
+    - at most `max_concurrent` turns run the graph at once,
+    - at most `max_queue` more may wait (beyond that -> QueueFull / 429),
+    - turns on the same thread_id run one at a time, in arrival order,
+    - per-resource budgets (llm / ocr / transcription) cap expensive calls.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        resource_limits: Dict[str, int],
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._thread_locks: Dict[str, List] = {}  # thread_id -> [lock, users]
+        self._resources = {name: _Resource(n) for name, n in resource_limits.items()}
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait = _WaitStats()
+        self._service_ewma = 1.0  # seconds, seeds the Retry-After estimate
+
+    # ---------- helpers ----------
+
+    def retry_after(self) -> int:
+        """Rough time until a queue slot frees up, in whole seconds (1..60)."""
+        est = self._service_ewma * (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, min(60, math.ceil(est)))
+
+    def _acquire_thread_lock(self, thread_id: str) -> asyncio.Lock:
+        entry = self._thread_locks.get(thread_id)
+        if entry is None:
+            entry = self._thread_locks[thread_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_thread_lock(self, thread_id: str) -> None:
+        entry = self._thread_locks.get(thread_id)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._thread_locks[thread_id]
+
+    # ---------- request admission ----------
+
+    @asynccontextmanager
+    async def admit(self, thread_id: str):
+        enqueued = time.monotonic()
+        lock = self._acquire_thread_lock(thread_id)
+        have_lock = have_slot = False
+        try:
+            if not lock.locked() and not self._slots.locked():
+                # Free slot and nothing ahead on this thread: both acquires
+                # return without suspending, so this request never queues.
+                await lock.acquire()
+                have_lock = True
+                await self._slots.acquire()
+                have_slot = True
+            else:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise QueueFull("Too many queued requests.", self.retry_after())
+                self.waiting += 1
+                try:
+                    # Same-thread turns wait here first so they don't hold a global slot.
+                    await asyncio.wait_for(lock.acquire(), self.queue_timeout)
+                    have_lock = True
+                    remaining = self.queue_timeout - (time.monotonic() - enqueued)
+                    await asyncio.wait_for(self._slots.acquire(), max(remaining, 0.001))
+                    have_slot = True
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    raise QueueTimeout("Timed out waiting for capacity.", self.retry_after())
+                finally:
+                    self.waiting -= 1
+
+            started = time.monotonic()
+            self._wait.add(started - enqueued)
+            self.admitted += 1
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                elapsed = time.monotonic() - started
+                self._service_ewma = 0.8 * self._service_ewma + 0.2 * elapsed
+        finally:
+            if have_slot:
+                self._slots.release()
+            if have_lock:
+                lock.release()
+            self._release_thread_lock(thread_id)
+
+    # ---------- per-resource budgets ----------
+
+    @asynccontextmanager
+    async def resource(self, name: str):
+        res = self._resources.get(name)
+        if res is None:
+            yield
+            return
+
+        res.waiting += 1
+        start = time.monotonic()
+        try:
+            await res.sem.acquire()
+        finally:
+            res.waiting -= 1
+        res.wait.add(time.monotonic() - start)
+        res.in_use += 1
+        try:
+            yield
+        finally:
+            res.in_use -= 1
+            res.sem.release()
+
+    def snapshot(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "active_threads": len(self._thread_locks),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_wait": self._wait.snapshot(),
+            "retry_after_s": self.retry_after(),
+            "resources": {
+                name: {
+                    "limit": r.limit,
+                    "in_use": r.in_use,
+                    "queue_depth": r.waiting,
+                    "wait": r.wait.snapshot(),
+                }
+                for name, r in self._resources.items()
+            },
+        }
+
+
+admission = AdmissionController(
+    max_concurrent=MAX_CONCURRENT_REQUESTS,
+    max_queue=MAX_QUEUED_REQUESTS,
+    queue_timeout=QUEUE_TIMEOUT_SECONDS,
+    resource_limits={
+        "llm": LLM_CONCURRENCY,
+        "ocr": OCR_CONCURRENCY,
+        "transcription": TRANSCRIPTION_CONCURRENCY,
+    },
+)
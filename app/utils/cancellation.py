@@ -0,0 +1,88 @@
+# app/utils/cancellation.py
+import asyncio
+import contextvars
+import weakref
+from typing import Callable, Dict, List, Optional
+
+
+class CancellationStats:
+    """Counts of work abandoned because the client went away (for /api/metrics)."""
+
+    KINDS = (
+        "requests",         # graph runs cancelled (disconnect / closed stream)
+        "llm_calls",        # chat completions in flight
+        "ocr_calls",        # vision OCR calls in flight
+        "transcriptions",   # Whisper calls in flight
+        "extraction_jobs",  # progressive extractions stopped early
+        "extractions_kept", # thread-bound extractions finished and cached anyway
+    )
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {k: 0 for k in self.KINDS}
+
+    def record(self, kind: str) -> None:
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+cancellations = CancellationStats()
+
+
+class TurnScope:
+    """
+    Cleanup hooks for work a request starts outside its own task (e.g. a
+    progressive extraction job). Run only when the request is cancelled;
+    a turn that completes leaves such work running.
+    """
+
+    def __init__(self):
+        self._callbacks: List[Callable[[], None]] = []
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def cancel(self) -> None:
+        callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            cb()
+
+
+_turn: contextvars.ContextVar[Optional[TurnScope]] = contextvars.ContextVar(
+    "turn_scope", default=None
+)
+
+
+def enter_turn(scope: TurnScope) -> contextvars.Token:
+    return _turn.set(scope)
+
+
+def exit_turn(token: contextvars.Token) -> None:
+    _turn.reset(token)
+
+
+def on_turn_cancel(callback: Callable[[], None]) -> None:
+    """Register `callback` with the current request's scope, if any."""
+    scope = _turn.get()
+    if scope is not None:
+        scope.on_cancel(callback)
+
+
+_discarded: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+
+def discard(task: asyncio.Task) -> None:
+    """
+    Cancel a task the code itself no longer needs (e.g. an early answer
+    superseded by the final one). Calls it had in flight are not counted as
+    cancellations: those stats are for work dropped because the client left.
+    """
+    _discarded.add(task)
+    task.cancel()
+
+
+def cancelled_by_client() -> bool:
+    """False inside a task stopped by discard()."""
+    task = asyncio.current_task()
+    return task is None or task not in _discarded
@@ -0,0 +1,296 @@
+# app/utils/compaction.py
+import bisect
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from .tokens import count_tokens
+
+_BREAK_RE = re.compile(r"[\n\f]")
+_WORD_RE = re.compile(r"\S+")
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+_HYPHENATED_RE = re.compile(r"[A-Za-z]{2}-$")
+_LETTERS_RE = re.compile(r"[A-Za-z]+")
+_INLINE_COMPOUND_RE = re.compile(r"[A-Za-z]+-[A-Za-z]+")
+_LINE_BREAK_HYPHEN_RE = re.compile(r"[A-Za-z]+-[ \t]*\n[ \t]*[A-Za-z]+")
+# Word endings that only appear as the tail of a word split by hyphenation.
+_SUFFIX_RE = re.compile(
+    r"(?:tion|sion|ment|ness|ing|ity|ities|able|ible|ance|ence|ous|ive|ally|ly"
+    r"|ed|er|est|ism|ist|ize|ise|ful|less|ure|al)s?"
+)
+# Common first halves of hyphenated compounds ("well-known", "self-service").
+_COMPOUND_HEADS = frozenset(
+    """well self non half cross ill ever full high low long short part semi
+    far open real one two three four five first second third""".split()
+)
+
+# Lines looked at for page furniture (headers / footers) at each end of a page.
+_FURNITURE_EDGE_LINES = 2
+_FURNITURE_MAX_CHARS = 80
+
+
+@dataclass
+class OffsetMap:
+    """
+    Maps positions in compacted text back to the original extraction.
+    Stored as sorted spans: out[o_start:o_start+n] came from raw[r_start:r_start+n].
+    """
+
+    out_starts: List[int] = field(default_factory=list)
+    raw_starts: List[int] = field(default_factory=list)
+    lengths: List[int] = field(default_factory=list)
+
+    def add(self, out_start: int, raw_start: int, length: int) -> None:
+        if self.out_starts:
+            i = len(self.out_starts) - 1
+            if (
+                self.out_starts[i] + self.lengths[i] == out_start
+                and self.raw_starts[i] + self.lengths[i] == raw_start
+            ):
+                self.lengths[i] += length
+                return
+        self.out_starts.append(out_start)
+        self.raw_starts.append(raw_start)
+        self.lengths.append(length)
+
+    def to_original(self, pos: int) -> int:
+        """Original offset of compacted position `pos`."""
+        if not self.out_starts:
+            return pos
+        i = max(0, bisect.bisect_right(self.out_starts, pos) - 1)
+        delta = min(max(pos - self.out_starts[i], 0), self.lengths[i] - 1)
+        return self.raw_starts[i] + delta
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """Original [start, end) covering compacted [start, end)."""
+        if end <= start:
+            return self.to_original(start), self.to_original(start)
+        return self.to_original(start), self.to_original(end - 1) + 1
+
+
+@dataclass
+class Compaction:
+    text: str
+    offsets: OffsetMap
+    raw_chars: int
+    raw_tokens: int
+    tokens: int
+    furniture_lines: int = 0
+    duplicate_lines: int = 0
+    joined_words: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+
+@dataclass
+class _Line:
+    start: int  # offset in the raw text
+    text: str
+    page: int
+
+
+def _split_lines(raw: str) -> Tuple[List[_Line], int]:
+    """Lines with their raw offsets; form feeds (PDF page breaks) start a new page."""
+    lines, page, start = [], 0, 0
+    for m in _BREAK_RE.finditer(raw):
+        lines.append(_Line(start, raw[start : m.start()], page))
+        if m.group() == "\f":
+            page += 1
+        start = m.end()
+    lines.append(_Line(start, raw[start:], page))
+    return lines, page + 1
+
+
+def _furniture_key(text: str) -> str:
+    # "Page 3 of 12" and "Page 4 of 12" are the same footer.
+    return _SPACE_RE.sub(" ", _DIGITS_RE.sub("#", text.lower())).strip()
+
+
+def _find_furniture(lines: List[_Line], pages: int) -> Set[int]:
+    """Indexes of header/footer lines that repeat at the edges of most pages."""
+    if pages < 3:
+        return set()
+    by_page: Dict[int, List[int]] = defaultdict(list)
+    for i, line in enumerate(lines):
+        if line.text.strip():
+            by_page[line.page].append(i)
+
+    candidates: Dict[str, List[int]] = defaultdict(list)
+    seen_on: Dict[str, Set[int]] = defaultdict(set)
+    for page, idx in by_page.items():
+        edge = idx[:_FURNITURE_EDGE_LINES] + idx[-_FURNITURE_EDGE_LINES:]
+        for i in dict.fromkeys(edge):
+            key = _furniture_key(lines[i].text)
+            if len(key) <= _FURNITURE_MAX_CHARS:
+                candidates[key].append(i)
+                seen_on[key].add(page)
+
+    min_pages = max(3, math.ceil(pages / 2))
+    return {
+        i
+        for key, idx in candidates.items()
+        if len(seen_on[key]) >= min_pages
+        for i in idx
+    }
+
+
+def _dedupe_key(text: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+@dataclass
+class _Vocabulary:
+    words: Set[str]  # lowercase words, not counting line-break fragments
+    compounds: Set[str]  # hyphenated forms written on one line ("well-known")
+
+    @classmethod
+    def of(cls, raw: str) -> "_Vocabulary":
+        inline = _LINE_BREAK_HYPHEN_RE.sub(" ", raw)
+        return cls(
+            {w.lower() for w in _LETTERS_RE.findall(inline)},
+            {c.lower() for c in _INLINE_COMPOUND_RE.findall(inline)},
+        )
+
+
+def _keep_hyphen(left: str, right: str, vocab: _Vocabulary) -> bool:
+    """
+    Is "left-" + newline + "right" a compound ("well-known") rather than one
+    word broken by hyphenation ("infor-mation")? The document itself is the
+    best evidence: the form it uses elsewhere wins. Otherwise a bare suffix
+    means a broken word, and two real words mean a compound.
+    """
+    left, right = left.lower(), right.lower()
+    if f"{left}-{right}" in vocab.compounds:
+        return True
+    if left + right in vocab.words:
+        return False
+    if _SUFFIX_RE.fullmatch(right):
+        return False
+    return left in _COMPOUND_HEADS or (left in vocab.words and right in vocab.words)
+
+
+def compact_text(raw: str, dedupe_min_chars: int = 20) -> Compaction:
+    """
+    Deterministic cleanup of extracted text before it reaches a prompt:
+    drops page headers/footers repeated across pages, collapses whitespace
+    and blank lines, rejoins words hyphenated across line breaks, and drops
+    lines that repeat an earlier line (ignoring case, spacing and
+    punctuation but not digits; only lines of at least `dedupe_min_chars`).
+
+    A line ending in "-" followed by a lowercase word is joined without a
+    break. Whether the hyphen stays is decided by _keep_hyphen, from the
+    document's own vocabulary first.
+    """
+    lines, pages = _split_lines(raw)
+    furniture = _find_furniture(lines, pages)
+    vocab = _Vocabulary.of(raw)
+
+    out: List[str] = []
+    offsets = OffsetMap()
+    size = 0
+
+    def put(piece: str, raw_start: int, mapped: bool = True) -> None:
+        nonlocal size
+        out.append(piece)
+        if mapped:
+            offsets.add(size, raw_start, len(piece))
+        else:  # synthetic separator: point every char at one raw position
+            for k in range(len(piece)):
+                offsets.add(size + k, raw_start, 1)
+        size += len(piece)
+
+    seen: Set[str] = set()
+    duplicates = joined = 0
+    prev_end = 0  # raw offset just past the last emitted line
+    blank_pending = False
+    hyphen_open = False
+
+    for i, line in enumerate(lines):
+        words = list(_WORD_RE.finditer(line.text))
+        if not words:
+            blank_pending = True
+            continue
+        if i in furniture:
+            hyphen_open = False
+            continue
+        key = _dedupe_key(line.text)
+        if len(key) >= dedupe_min_chars:
+            if key in seen:
+                duplicates += 1
+                hyphen_open = False
+                continue
+            seen.add(key)
+
+        first = words[0]
+        if hyphen_open and not blank_pending and first.group()[0].islower():
+            # No separator; "infor-\nmation" -> "information", "well-\nknown" -> "well-known".
+            left = _LETTERS_RE.findall(out[-1])[-1]
+            right = _LETTERS_RE.match(first.group())
+            if right is not None and not _keep_hyphen(left, right.group(), vocab):
+                out[-1] = out[-1][:-1]
+                size -= 1
+                offsets.lengths[-1] -= 1
+            joined += 1
+        elif size:
+            put("\n\n" if blank_pending else "\n", prev_end, mapped=False)
+        blank_pending = False
+
+        for j, w in enumerate(words):
+            if j:
+                put(" ", line.start + words[j - 1].end(), mapped=False)
+            put(w.group(), line.start + w.start())
+        last = words[-1].group()
+        hyphen_open = bool(_HYPHENATED_RE.search(last))
+        prev_end = line.start + words[-1].end()
+
+    text = "".join(out)
+    furniture_count = len(furniture)
+    return Compaction(
+        text=text,
+        offsets=offsets,
+        raw_chars=len(raw),
+        raw_tokens=count_tokens(raw),
+        tokens=count_tokens(text),
+        furniture_lines=furniture_count,
+        duplicate_lines=duplicates,
+        joined_words=joined,
+    )
+
+
+class CompactionStats:
+    """Running totals for /api/metrics."""
+
+    def __init__(self):
+        self.documents = 0
+        self.raw_tokens = 0
+        self.tokens_saved = 0
+        self.furniture_lines = 0
+        self.duplicate_lines = 0
+        self.joined_words = 0
+
+    def record(self, c: Compaction) -> None:
+        self.documents += 1
+        self.raw_tokens += c.raw_tokens
+        self.tokens_saved += c.tokens_saved
+        self.furniture_lines += c.furniture_lines
+        self.duplicate_lines += c.duplicate_lines
+        self.joined_words += c.joined_words
+
+    def snapshot(self) -> dict:
+        return {
+            "documents": self.documents,
+            "tokens_saved": self.tokens_saved,
+            "saved_ratio": round(self.tokens_saved / self.raw_tokens, 3) if self.raw_tokens else 0.0,
+            "furniture_lines": self.furniture_lines,
+            "duplicate_lines": self.duplicate_lines,
+            "joined_words": self.joined_words,
+        }
+
+
+compaction_stats = CompactionStats()
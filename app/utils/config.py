@@ -5,5 +5,73 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Point at a compatible server (e.g. the offline benchmark stub); None = api.openai.com
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 WHISPER_MODEL = os.getenv("OPENAI_WHISPER_MODEL", "whisper-1")
+
+# Per-step model routing (see app/utils/router.py)
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+OPENAI_STRONG_MODEL = os.getenv("OPENAI_STRONG_MODEL", "gpt-4o")
+OPENAI_VISION_MODEL = os.getenv("OPENAI_VISION_MODEL", OPENAI_MODEL)
+ROUTE_TIMEOUT_SECONDS = float(os.getenv("ROUTE_TIMEOUT_SECONDS", "45"))
+# JSON overrides, e.g. {"planner": {"model": "gpt-4o-mini", "timeout": 10}}
+MODEL_ROUTES_JSON = os.getenv("MODEL_ROUTES", "")
+
+YOUTUBE_CACHE_TTL_SECONDS = int(os.getenv("YOUTUBE_CACHE_TTL_SECONDS", "3600"))
+YOUTUBE_CACHE_SIZE = int(os.getenv("YOUTUBE_CACHE_SIZE", "256"))
+
+# Admission control for /api/chat
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "32"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "30"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "2"))
+TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", "2"))
+
+# Retries / hedging / circuit breaking around OpenAI calls
+LLM_CALL_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "60"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "120"))
+# How often /api/chat checks whether the client is still connected
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", "8"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "3"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.5"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Uploaded files (content-addressed, see app/utils/file_store.py)
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", ".uploads")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+# Retention: least recently used files go first once the store is over
+# UPLOAD_MAX_TOTAL_BYTES; files unused for UPLOAD_MAX_AGE_SECONDS are dropped (0 = no limit).
+UPLOAD_MAX_TOTAL_BYTES = int(os.getenv("UPLOAD_MAX_TOTAL_BYTES", str(2 * 1024**3)))
+UPLOAD_MAX_AGE_SECONDS = float(os.getenv("UPLOAD_MAX_AGE_SECONDS", str(7 * 86400)))
+
+# Per-thread document registry (see app/utils/documents.py)
+DOC_REGISTRY_MAX_THREADS = int(os.getenv("DOC_REGISTRY_MAX_THREADS", "1024"))
+
+# Semantic answer cache for document QA (see app/utils/semantic_cache.py)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_EMBEDDER = os.getenv("SEMANTIC_CACHE_EMBEDDER", "local")  # local | openai
+SEMANTIC_CACHE_EMBEDDING_MODEL = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+SEMANTIC_CACHE_MAX_PER_SCOPE = int(os.getenv("SEMANTIC_CACHE_MAX_PER_SCOPE", "256"))
+SEMANTIC_CACHE_MAX_SCOPES = int(os.getenv("SEMANTIC_CACHE_MAX_SCOPES", "512"))
+
+# Progressive extraction for large PDFs / audio (see app/extractors/progressive.py)
+PROGRESSIVE_ENABLED = os.getenv("PROGRESSIVE_ENABLED", "1") == "1"
+PROGRESSIVE_MIN_BYTES = int(os.getenv("PROGRESSIVE_MIN_BYTES", str(1024 * 1024)))
+# ... or when the extractor's cost estimate (app/extractors/registry.py) exceeds this
+PROGRESSIVE_MIN_SECONDS = float(os.getenv("PROGRESSIVE_MIN_SECONDS", "30"))
+PROGRESSIVE_PDF_BATCH_PAGES = int(os.getenv("PROGRESSIVE_PDF_BATCH_PAGES", "10"))
+PROGRESSIVE_AUDIO_SEGMENT_SECONDS = float(os.getenv("PROGRESSIVE_AUDIO_SEGMENT_SECONDS", "300"))
+PROGRESSIVE_QA_TOP_K = int(os.getenv("PROGRESSIVE_QA_TOP_K", "6"))
+
+# Text compaction after extraction (see app/utils/compaction.py)
+COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "1") == "1"
+COMPACTION_DEDUPE_MIN_CHARS = int(os.getenv("COMPACTION_DEDUPE_MIN_CHARS", "20"))
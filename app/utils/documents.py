@@ -0,0 +1,198 @@
+# app/utils/documents.py
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from .compaction import Compaction, compaction_stats
+from .config import DOC_REGISTRY_MAX_THREADS
+from .file_store import file_store
+from .tokens import count_tokens
+
+
+@dataclass
+class Document:
+    doc_id: str
+    name: str
+    source_type: str  # "text" | "docx" | "image" | "pdf" | "audio" | "youtube" | ...
+    sha256: str
+    chars: int
+    token_count: int
+    created_at: float
+    file_id: Optional[str] = None
+    compacted: bool = False
+    tokens_saved: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class _ThreadCache(LRUCache):
+    """LRU of thread_id -> documents that releases text refs on eviction."""
+
+    def __init__(self, maxsize: int, registry: "DocumentRegistry"):
+        super().__init__(maxsize)
+        self._registry = registry
+
+    def popitem(self):
+        key, docs = super().popitem()
+        for doc in docs.values():
+            self._registry._release(doc.sha256)
+        return key, docs
+
+
+class DocumentRegistry:
+    """
+    Per-thread registry of extracted documents.
+
+    Threads only hold small metadata records; the text itself lives here,
+    keyed by content hash and shared between threads (the same upload on ten
+    threads is stored once). Graph nodes fetch text lazily by doc_id, so the
+    checkpoint carries ids instead of the full document.
+    """
+
+    def __init__(self, max_threads: int):
+        self._threads: _ThreadCache = _ThreadCache(max_threads, self)
+        self._texts: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+        self._compactions: Dict[str, Compaction] = {}
+
+    def _release(self, sha: str) -> None:
+        self._refs[sha] = self._refs.get(sha, 1) - 1
+        if self._refs[sha] <= 0:
+            self._refs.pop(sha, None)
+            self._texts.pop(sha, None)
+            self._compactions.pop(sha, None)
+
+    def add(
+        self,
+        thread_id: str,
+        text: str,
+        source_type: str,
+        name: str = "",
+        file_id: Optional[str] = None,
+        token_count: Optional[int] = None,
+    ) -> Document:
+        """
+        Register `text` on a thread; re-adding identical content is a no-op.
+        Callers on the event loop pass token_count, counted in a worker thread.
+        """
+        sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        doc_id = sha[:16]
+        docs = self._threads.get(thread_id)
+        if docs is None:
+            docs = OrderedDict()
+            self._threads[thread_id] = docs
+        if doc_id in docs:
+            docs.move_to_end(doc_id)
+            return docs[doc_id]
+
+        doc = Document(
+            doc_id=doc_id,
+            name=name or f"{source_type}-{doc_id[:6]}",
+            source_type=source_type,
+            sha256=sha,
+            chars=len(text),
+            token_count=count_tokens(text) if token_count is None else token_count,
+            created_at=time.time(),
+            file_id=file_id,
+        )
+        docs[doc_id] = doc
+        self._texts.setdefault(sha, text)
+        self._refs[sha] = self._refs.get(sha, 0) + 1
+        return doc
+
+    def list(self, thread_id: str) -> List[Document]:
+        return list((self._threads.get(thread_id) or {}).values())
+
+    def get(self, thread_id: str, doc_id: str) -> Optional[Document]:
+        return (self._threads.get(thread_id) or {}).get(doc_id)
+
+    def unresolved(self, thread_id: str, selector: Optional[str]) -> List[str]:
+        """
+        Ids / names in a selector (see resolve) that match no document on the
+        thread. "all" and "latest" never miss: on an empty thread they select
+        nothing.
+        """
+        if not selector or selector.strip() in ("", "all", "latest"):
+            return []
+        docs = self.list(thread_id)
+        wanted = [s.strip() for s in selector.split(",") if s.strip()]
+        return [
+            w for w in wanted
+            if not any(d.doc_id.startswith(w) or d.name == w for d in docs)
+        ]
+
+    def resolve(self, thread_id: str, selector: Optional[str]) -> List[Document]:
+        """
+        Turn a selector into documents: "all", "latest", or a comma-separated
+        list of doc ids (prefixes are fine) and/or document names.
+        """
+        docs = self.list(thread_id)
+        if not selector or not docs:
+            return []
+        selector = selector.strip()
+        if selector == "all":
+            return docs
+        if selector == "latest":
+            return docs[-1:]
+        wanted = [s.strip() for s in selector.split(",") if s.strip()]
+        return [
+            d for d in docs
+            if any(d.doc_id.startswith(w) or d.name == w for w in wanted)
+        ]
+
+    def apply_compaction(self, doc: Document, compaction: Compaction) -> None:
+        """
+        Attach a compacted form to a document. The original extraction stays
+        stored (it is what the offset map points into and what a transcript
+        returns); prompt_text() serves the compacted form to the models.
+        """
+        if doc.sha256 not in self._compactions and doc.sha256 in self._texts:
+            self._compactions[doc.sha256] = compaction
+            compaction_stats.record(compaction)
+        current = self._compactions.get(doc.sha256, compaction)
+        doc.compacted = True
+        doc.chars = len(current.text)
+        doc.token_count = current.tokens
+        doc.tokens_saved = current.tokens_saved
+
+    def compaction(self, doc: Document) -> Optional[Compaction]:
+        """Compaction of an already compacted document (shared by content)."""
+        return self._compactions.get(doc.sha256)
+
+    def original_span(self, doc: Document, start: int, end: int) -> Tuple[int, int]:
+        """Map [start, end) in prompt_text(doc) to the same span in text(doc)."""
+        compaction = self._compactions.get(doc.sha256)
+        return compaction.offsets.span(start, end) if compaction else (start, end)
+
+    def text(self, doc: Document) -> str:
+        """The document as extracted."""
+        text = self._texts.get(doc.sha256)
+        if text is None and doc.file_id:
+            text = file_store.get_extraction(doc.file_id)
+        return text or ""
+
+    def prompt_text(self, doc: Document) -> str:
+        """The text models see: the compacted form when there is one."""
+        compaction = self._compactions.get(doc.sha256)
+        return compaction.text if compaction else self.text(doc)
+
+    def joined_text(self, thread_id: str, doc_ids: List[str], raw: bool = False) -> str:
+        """
+        Prompt text of the given documents (raw=True: as extracted); several
+        are separated by a header line.
+        """
+        docs = [d for d in (self.get(thread_id, i) for i in doc_ids or []) if d]
+        text = self.text if raw else self.prompt_text
+        if len(docs) == 1:
+            return text(docs[0])
+        return "\n\n".join(
+            f"### Document: {d.name} ({d.source_type}, id {d.doc_id})\n{text(d)}"
+            for d in docs
+        )
+
+documents = DocumentRegistry(DOC_REGISTRY_MAX_THREADS)
@@ -0,0 +1,167 @@
+# app/utils/file_store.py
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Tuple
+
+from .config import UPLOAD_DIR, UPLOAD_MAX_AGE_SECONDS, UPLOAD_MAX_TOTAL_BYTES
+
+_FILE_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass
+class StoredFile:
+    file_id: str
+    file_name: str
+    content_type: str
+    size: int
+
+
+class FileStore:
+    """
+    Content-addressed upload store on local disk. The file_id is the sha256 of
+    the bytes, so re-uploading the same file is a no-op, and the extracted
+    text is cached next to it so OCR/transcription runs once per file.
+
+    Layout: <root>/<file_id>.bin, .json (metadata), .txt (extracted text)
+
+    Retention: the .json mtime records the last use (put / get_meta). Each
+    put drops files unused for `max_age_seconds`, then the least recently
+    used ones until the store fits in `max_total_bytes` (0 = no limit).
+    """
+
+    EXTENSIONS = ("bin", "json", "txt")
+
+    def __init__(self, root: str, max_total_bytes: int = 0, max_age_seconds: float = 0):
+        self.root = root
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evicted = 0
+
+    @staticmethod
+    def is_valid_id(file_id: str) -> bool:
+        return bool(_FILE_ID_RE.match(file_id or ""))
+
+    def _path(self, file_id: str, ext: str) -> str:
+        if not self.is_valid_id(file_id):
+            raise ValueError(f"invalid file_id: {file_id!r}")
+        return os.path.join(self.root, f"{file_id}.{ext}")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def put(self, data: bytes, file_name: str, content_type: str) -> StoredFile:
+        file_id = hashlib.sha256(data).hexdigest()
+        meta = StoredFile(file_id, file_name or "", content_type or "", len(data))
+        if not os.path.exists(self._path(file_id, "bin")):
+            self._write_atomic(self._path(file_id, "bin"), data)
+        self._write_atomic(self._path(file_id, "json"), json.dumps(asdict(meta)).encode())
+        self.evict(keep=file_id)
+        return meta
+
+    def get_meta(self, file_id: str) -> Optional[StoredFile]:
+        if not self.is_valid_id(file_id):
+            return None
+        path = self._path(file_id, "json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                meta = StoredFile(**json.load(f))
+            os.utime(path)
+            return meta
+        except FileNotFoundError:
+            return None
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(last used, bytes on disk, file_id) of every stored file."""
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            file_id, ext = os.path.splitext(name)
+            if ext != ".json" or not self.is_valid_id(file_id):
+                continue
+            try:
+                used = os.path.getmtime(os.path.join(self.root, name))
+                size = sum(
+                    os.path.getsize(p)
+                    for p in (self._path(file_id, e) for e in self.EXTENSIONS)
+                    if os.path.exists(p)
+                )
+            except FileNotFoundError:  # removed concurrently
+                continue
+            entries.append((used, size, file_id))
+        return entries
+
+    def remove(self, file_id: str) -> None:
+        for ext in self.EXTENSIONS:
+            try:
+                os.unlink(self._path(file_id, ext))
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Apply the retention limits; returns the number of files removed."""
+        if not self.max_total_bytes and not self.max_age_seconds:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        removed = 0
+        for used, size, file_id in entries:
+            expired = cutoff is not None and used < cutoff
+            over = bool(self.max_total_bytes) and total > self.max_total_bytes
+            if not (expired or over):
+                break
+            if file_id == keep:
+                continue
+            self.remove(file_id)
+            total -= size
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    def read_bytes(self, file_id: str) -> Optional[bytes]:
+        try:
+            with open(self._path(file_id, "bin"), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def read_head(self, file_id: str, size: int) -> Tuple[bytes, int]:
+        """First `size` bytes and the total size (b"", 0 when missing)."""
+        try:
+            path = self._path(file_id, "bin")
+            with open(path, "rb") as f:
+                return f.read(size), os.path.getsize(path)
+        except (FileNotFoundError, ValueError):
+            return b"", 0
+
+    def get_extraction(self, file_id: str) -> Optional[str]:
+        try:
+            with open(self._path(file_id, "txt"), encoding="utf-8") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_extraction(self, file_id: str, text: str) -> None:
+        if not os.path.exists(self._path(file_id, "bin")):
+            return  # evicted meanwhile
+        self._write_atomic(self._path(file_id, "txt"), text.encode("utf-8"))
+
+
+file_store = FileStore(UPLOAD_DIR, UPLOAD_MAX_TOTAL_BYTES, UPLOAD_MAX_AGE_SECONDS)
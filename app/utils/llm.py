@@ -1,10 +1,22 @@
 # app/utils/llm.py
+from functools import lru_cache
 from typing import Any, Dict, List
 import json
-from openai import OpenAI
-from .config import OPENAI_API_KEY, OPENAI_MODEL
+from .admission import admission
+from .config import OPENAI_API_KEY, OPENAI_BASE_URL
+from .router import routed_call
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    The one AsyncOpenAI client shared by chat, vision OCR and Whisper.
+    Created (and the openai package imported) on first use.
+    Retries are handled by resilient_call, so the SDK's own retry loop is off.
+    """
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0)
 
 
 def _normalize_messages(raw_messages: List[Any]) -> List[Dict[str, str]]:
@@ -36,15 +48,27 @@ def _normalize_messages(raw_messages: List[Any]) -> List[Dict[str, str]]:
     return normalized
 
 
-async def chat_llm(messages: List[Dict[str, str]]) -> str:
+async def chat_llm(
+    messages: List[Dict[str, str]], step: str = "conversation", hedge: bool = False
+) -> str:
     """
     Simple wrapper. messages can be LangChain messages or dicts.
+    `step` picks the model via the router; set hedge=True only for
+    idempotent prompts (planner, sentiment) where a duplicate is harmless.
     """
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=_normalize_messages(messages),
-        temperature=0.2,
-    )
+    normalized = _normalize_messages(messages)
+    input_chars = sum(len(m["content"] or "") for m in normalized)
+    async with admission.resource("llm"):
+        resp = await routed_call(
+            step,
+            lambda model: get_client().chat.completions.create(
+                model=model,
+                messages=normalized,
+                temperature=0.2,
+            ),
+            input_chars=input_chars,
+            hedge=hedge,
+        )
     return resp.choices[0].message.content
 
 
@@ -57,7 +81,7 @@ async def llm_json(prompt: str) -> Dict[str, Any]:
         "content": "You are a strict JSON generator. Always return ONLY a valid JSON object.",
     }
     user = {"role": "user", "content": prompt}
-    content = await chat_llm([system, user])
+    content = await chat_llm([system, user], step="planner", hedge=True)
 
     try:
         start = content.find("{")
@@ -0,0 +1,32 @@
+# app/utils/progress.py
+import asyncio
+import contextvars
+from typing import Dict, Optional
+
+# Queue of partial-output events for the current request (streaming endpoint
+# only); nodes call emit() and it is a no-op when nobody is listening.
+_channel: contextvars.ContextVar[Optional[asyncio.Queue]] = contextvars.ContextVar(
+    "progress_channel", default=None
+)
+
+
+def open_channel() -> "tuple[contextvars.Token, asyncio.Queue]":
+    queue: asyncio.Queue = asyncio.Queue()
+    return _channel.set(queue), queue
+
+
+def close_channel(token: contextvars.Token) -> None:
+    _channel.reset(token)
+
+
+def emit(node: str, text: str, **extra) -> None:
+    queue = _channel.get()
+    if queue is not None:
+        event: Dict = {"type": "partial", "node": node, "text": text}
+        event.update(extra)
+        queue.put_nowait(event)
+
+
+def listening() -> bool:
+    """True when the current request streams partial output."""
+    return _channel.get() is not None
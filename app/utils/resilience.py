@@ -0,0 +1,286 @@
+# app/utils/resilience.py
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
+
+from .config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_PERCENTILE,
+    LLM_CALL_DEADLINE_SECONDS,
+    LLM_MAX_ATTEMPTS,
+    RETRY_BASE_SECONDS,
+    RETRY_MAX_SECONDS,
+)
+
+T = TypeVar("T")
+
+# Absolute (monotonic) deadline of the current /api/chat turn, if any.
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class CircuitOpenError(Exception):
+    """The circuit for an upstream operation is open; fail fast."""
+
+    def __init__(self, op: str, retry_after: float):
+        super().__init__(f"Circuit open for '{op}'.")
+        self.op = op
+        self.retry_after = retry_after
+
+
+def set_request_deadline(seconds: float) -> contextvars.Token:
+    """Bound every retry loop started in this context to `seconds` from now."""
+    return _request_deadline.set(time.monotonic() + seconds)
+
+
+def reset_request_deadline(token: contextvars.Token) -> None:
+    _request_deadline.reset(token)
+
+
+def request_deadline_passed() -> bool:
+    """True once the current turn's deadline (if any) has expired."""
+    deadline = _request_deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient errors (timeouts, connection drops, 408/409/429, 5xx) are retried."""
+    import openai  # already loaded by the time a call can fail
+
+    if isinstance(exc, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+class LatencyTracker:
+    """Recent successful-call latencies (seconds) for one operation."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. Opens after `threshold`
+    consecutive retryable failures; after `reset_after` seconds one trial
+    call is let through, and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_after - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def abandon(self) -> None:
+        """The call was cancelled: neither success nor failure, free the trial slot."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class _OpStats:
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+
+
+_ops: Dict[str, _OpStats] = {}
+
+
+def _stats(op: str) -> _OpStats:
+    stats = _ops.get(op)
+    if stats is None:
+        stats = _ops[op] = _OpStats()
+    return stats
+
+
+async def _hedged(stats: _OpStats, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Start `call`; if it hasn't finished by the tracked latency percentile,
+    start an identical second call and take whichever succeeds first.
+    """
+    delay = stats.latency.percentile(HEDGE_PERCENTILE)
+    delay = max(delay if delay is not None else HEDGE_DEFAULT_DELAY_SECONDS, HEDGE_MIN_DELAY_SECONDS)
+
+    primary = asyncio.ensure_future(call())
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            hedge = asyncio.ensure_future(call())
+            pending.add(hedge)
+            stats.hedges_sent += 1
+
+        last_exc: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        stats.hedge_wins += 1
+                    return task.result()
+                last_exc = task.exception()
+        raise last_exc
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def resilient_call(
+    op: str,
+    call: Callable[[], Awaitable[T]],
+    *,
+    hedge: bool = False,
+    deadline: float = LLM_CALL_DEADLINE_SECONDS,
+) -> T:
+    """
+    Run an upstream call with:
+    - circuit breaker per `op` (fails fast with CircuitOpenError),
+    - retries with jittered exponential backoff for retryable errors,
+    - an overall deadline (the smaller of `deadline` and the turn deadline),
+    - optional hedging for idempotent calls.
+    """
+    stats = _stats(op)
+    stats.calls += 1
+
+    deadline_at = time.monotonic() + deadline
+    turn_deadline = _request_deadline.get()
+    if turn_deadline is not None:
+        deadline_at = min(deadline_at, turn_deadline)
+
+    async def timed() -> T:
+        start = time.monotonic()
+        result = await call()
+        stats.latency.add(time.monotonic() - start)
+        return result
+
+    def count_retry(_retry_state) -> None:
+        stats.retries += 1
+
+    backoff = wait_random_exponential(multiplier=RETRY_BASE_SECONDS, max=RETRY_MAX_SECONDS)
+
+    def wait(retry_state) -> float:
+        # Never sleep past the deadline only to give up on waking.
+        return min(backoff(retry_state), max(deadline_at - time.monotonic(), 0))
+
+    retrying = AsyncRetrying(
+        retry=retry_if_exception(is_retryable),
+        wait=wait,
+        stop=stop_after_attempt(LLM_MAX_ATTEMPTS)
+        | stop_after_delay(max(deadline_at - time.monotonic(), 0)),
+        before_sleep=count_retry,
+        reraise=True,
+    )
+
+    try:
+        async for attempt in retrying:
+            with attempt:
+                if not stats.breaker.allow():
+                    stats.short_circuited += 1
+                    raise CircuitOpenError(op, stats.breaker.retry_after())
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    result = await asyncio.wait_for(
+                        _hedged(stats, timed) if hedge else timed(), remaining
+                    )
+                except asyncio.CancelledError:
+                    stats.breaker.abandon()
+                    raise
+                except Exception as e:
+                    if is_retryable(e):
+                        stats.breaker.record_failure()
+                    else:
+                        # The upstream answered (e.g. a 400): it is healthy.
+                        stats.breaker.record_success()
+                    raise
+                stats.breaker.record_success()
+                return result
+    except Exception:
+        stats.failures += 1
+        raise
+
+
+def resilience_snapshot() -> Dict:
+    out = {}
+    for op, s in _ops.items():
+        p50 = s.latency.percentile(50)
+        hedge_after = s.latency.percentile(HEDGE_PERCENTILE)
+        out[op] = {
+            "calls": s.calls,
+            "retries": s.retries,
+            "failures": s.failures,
+            "hedges_sent": s.hedges_sent,
+            "hedge_wins": s.hedge_wins,
+            "short_circuited": s.short_circuited,
+            "circuit": s.breaker.state,
+            "latency_p50_s": round(p50, 3) if p50 is not None else None,
+            "hedge_after_s": round(hedge_after, 3) if hedge_after is not None else None,
+        }
+    return out
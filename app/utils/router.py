@@ -0,0 +1,178 @@
+# app/utils/router.py
+import asyncio
+import contextvars
+import json
+import time
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from .config import (
+    MODEL_ROUTES_JSON,
+    OPENAI_FAST_MODEL,
+    OPENAI_MODEL,
+    OPENAI_STRONG_MODEL,
+    OPENAI_VISION_MODEL,
+    ROUTE_TIMEOUT_SECONDS,
+    WHISPER_MODEL,
+)
+from .cancellation import cancellations, cancelled_by_client
+from .resilience import CircuitOpenError, request_deadline_passed, resilient_call
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Route:
+    """
+    Which model serves one step. Inputs longer than `large_threshold_chars`
+    go to `large_model`; if the chosen model times out (or its circuit is
+    open) the call is retried once on `fallback`.
+    """
+
+    model: str
+    fallback: Optional[str] = None
+    timeout: float = ROUTE_TIMEOUT_SECONDS
+    large_model: Optional[str] = None
+    large_threshold_chars: Optional[int] = None
+
+
+def _other_tier(model: str) -> str:
+    """Fallback on the other size tier, so it is a different model by default."""
+    return OPENAI_FAST_MODEL if model == OPENAI_STRONG_MODEL else OPENAI_STRONG_MODEL
+
+
+DEFAULT_ROUTES: Dict[str, Route] = {
+    "planner": Route(OPENAI_FAST_MODEL, fallback=_other_tier(OPENAI_FAST_MODEL), timeout=15),
+    "sentiment": Route(OPENAI_FAST_MODEL, fallback=_other_tier(OPENAI_FAST_MODEL), timeout=20),
+    "summary": Route(
+        OPENAI_MODEL,
+        fallback=_other_tier(OPENAI_MODEL),
+        large_model=OPENAI_STRONG_MODEL,
+        large_threshold_chars=60_000,
+    ),
+    "qa": Route(OPENAI_MODEL, fallback=_other_tier(OPENAI_MODEL)),
+    "conversation": Route(OPENAI_MODEL, fallback=_other_tier(OPENAI_MODEL)),
+    "code_explainer": Route(OPENAI_STRONG_MODEL, fallback=_other_tier(OPENAI_STRONG_MODEL)),
+    "ocr": Route(OPENAI_VISION_MODEL, fallback=_other_tier(OPENAI_VISION_MODEL)),
+    "transcription": Route(WHISPER_MODEL, timeout=120),
+}
+
+
+def _load_routes() -> Dict[str, Route]:
+    """DEFAULT_ROUTES, overridden per step by the MODEL_ROUTES env var (JSON)."""
+    routes = dict(DEFAULT_ROUTES)
+    if not MODEL_ROUTES_JSON:
+        return routes
+    for step, spec in json.loads(MODEL_ROUTES_JSON).items():
+        if isinstance(spec, str):
+            spec = {"model": spec}
+        base = routes.get(step, Route(OPENAI_MODEL))
+        routes[step] = replace(base, **spec)
+    return routes
+
+
+ROUTES = _load_routes()
+
+# Per-request list of {"step", "model", "latency_ms", "fallback"} dicts.
+_model_calls: contextvars.ContextVar[Optional[List[Dict]]] = contextvars.ContextVar(
+    "model_calls", default=None
+)
+
+
+def start_model_trace() -> contextvars.Token:
+    return _model_calls.set([])
+
+
+def get_model_trace() -> List[Dict]:
+    return list(_model_calls.get() or [])
+
+
+def reset_model_trace(token: contextvars.Token) -> None:
+    _model_calls.reset(token)
+
+
+def _record(step: str, model: str, started: float, fallback: bool) -> None:
+    calls = _model_calls.get()
+    if calls is not None:
+        calls.append(
+            {
+                "step": step,
+                "model": model,
+                "latency_ms": round((time.perf_counter() - started) * 1000.0, 2),
+                "fallback": fallback,
+            }
+        )
+
+
+def select_model(step: str, input_chars: int = 0) -> Route:
+    """Resolve the route for `step`, with `model` already sized for the input."""
+    route = ROUTES.get(step) or Route(OPENAI_MODEL)
+    if (
+        route.large_model
+        and route.large_threshold_chars is not None
+        and input_chars > route.large_threshold_chars
+    ):
+        route = replace(route, model=route.large_model)
+    return route
+
+
+# Which cancellation counter a step's in-flight call falls under.
+_CANCEL_KINDS = {"ocr": "ocr_calls", "transcription": "transcriptions"}
+
+
+async def routed_call(
+    step: str,
+    make_call: Callable[[str], Awaitable[T]],
+    *,
+    input_chars: int = 0,
+    hedge: bool = False,
+) -> T:
+    """
+    Run `make_call(model)` on the model routed for `step`, falling back to the
+    route's fallback model on timeout / open circuit. Each attempt that
+    completes is recorded in the per-request model trace.
+
+    Cancellation (client gone) propagates into the in-flight HTTP call,
+    which closes the upstream connection; it is counted per kind, unless the
+    code dropped the call itself (cancellation.discard).
+    """
+    try:
+        return await _routed_call(step, make_call, input_chars, hedge)
+    except asyncio.CancelledError:
+        if cancelled_by_client():
+            cancellations.record(_CANCEL_KINDS.get(step, "llm_calls"))
+        raise
+
+
+async def _routed_call(
+    step: str,
+    make_call: Callable[[str], Awaitable[T]],
+    input_chars: int,
+    hedge: bool,
+) -> T:
+    route = select_model(step, input_chars)
+
+    started = time.perf_counter()
+    try:
+        result = await resilient_call(
+            f"{step}:{route.model}",
+            lambda: make_call(route.model),
+            hedge=hedge,
+            deadline=route.timeout,
+        )
+    except (asyncio.TimeoutError, CircuitOpenError):
+        # No time left in the turn: a fallback call could only time out too.
+        if not route.fallback or route.fallback == route.model or request_deadline_passed():
+            raise
+    else:
+        _record(step, route.model, started, fallback=False)
+        return result
+
+    started = time.perf_counter()
+    result = await resilient_call(
+        f"{step}:{route.fallback}",
+        lambda: make_call(route.fallback),
+        hedge=hedge,
+    )
+    _record(step, route.fallback, started, fallback=True)
+    return result
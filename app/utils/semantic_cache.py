@@ -0,0 +1,275 @@
+# app/utils/semantic_cache.py
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Protocol
+
+import numpy as np
+
+from .config import (
+    SEMANTIC_CACHE_EMBEDDER,
+    SEMANTIC_CACHE_EMBEDDING_MODEL,
+    SEMANTIC_CACHE_MAX_PER_SCOPE,
+    SEMANTIC_CACHE_MAX_SCOPES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
+
+
+class Embedder(Protocol):
+    async def embed(self, text: str) -> np.ndarray:
+        """Return an L2-normalised 1-D float32 vector."""
+        ...
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    """a an the is are was were be been of to in on for from with by at as and or
+    what which do does did can could would should
+    please me my i you your we our us it its this that these those there here give
+    tell show list find any some all about""".split()
+)
+
+
+def _normalise_word(word: str) -> str:
+    # Tiny stemmer: "items" ~ "item", "listed" ~ "list". Good enough for cache keys.
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9']+")
+_NEGATIONS = frozenset(
+    "not no never none nothing nobody neither nor without except cannot".split()
+)
+# "Who approved X?" and "When was X approved?" ask for different answers.
+# "what" / "which" are left out: they are interchangeable with "list ...".
+_QUESTION_WORDS = {
+    "who": "who", "whom": "who", "whose": "who",
+    "when": "when", "where": "where", "why": "why", "how": "how",
+}
+
+
+def question_signature(question: str) -> FrozenSet[str]:
+    """
+    Tokens that change what a question asks even when the embedding barely
+    moves: the question word (who / when / where / why / how), numbers,
+    single letters ("project A"), capitalised names after the first word,
+    and negation. Two questions can share a cached answer only
+    if their signatures are equal.
+    """
+    sig = set()
+    for i, tok in enumerate(_TOKEN_RE.findall(question)):
+        low = tok.lower()
+        if low in _QUESTION_WORDS:
+            sig.add(_QUESTION_WORDS[low])
+        elif low in _NEGATIONS or low.endswith("n't"):
+            sig.add("<not>")
+        elif any(c.isdigit() for c in tok):
+            sig.add(low)
+        elif len(tok) == 1:
+            if tok not in ("a", "I"):
+                sig.add(low)
+        elif i > 0 and tok[0].isupper():
+            sig.add(low)
+    return frozenset(sig)
+
+
+class HashingEmbedder:
+    """
+    Offline embedder: hashed bag of content words plus character trigrams.
+    No model download, deterministic, and good at catching paraphrases that
+    share their key terms ("what are the action items?" / "list the action items").
+    """
+
+    def __init__(self, dim: int = 1024, trigram_weight: float = 0.3):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+
+    def _index(self, feature: str) -> int:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.dim
+
+    async def embed(self, text: str) -> np.ndarray:
+        return self.vector(text)
+
+    def vector(self, text: str) -> np.ndarray:
+        """Synchronous embed(), for callers that batch work in a thread."""
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = [
+            _normalise_word(w)
+            for w in _WORD_RE.findall(text.lower())
+            if w not in _STOPWORDS
+        ]
+        for w in words:
+            vec[self._index("w:" + w)] += 1.0
+            padded = f"#{w}#"
+            for i in range(len(padded) - 2):
+                vec[self._index("c:" + padded[i : i + 3])] += self.trigram_weight
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API (shared client)."""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def embed(self, text: str) -> np.ndarray:
+        from .llm import get_client
+
+        resp = await get_client().embeddings.create(model=self.model, input=text)
+        vec = np.asarray(resp.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+@dataclass
+class CacheLookup:
+    answer: Optional[str]
+    similarity: float
+    embedding: np.ndarray
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+
+class _Scope:
+    """Cached Q/A pairs for one document hash; embeddings kept as one matrix."""
+
+    def __init__(self, dim: int):
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.questions: List[str] = []
+        self.signatures: List[FrozenSet[str]] = []
+        self.answers: List[str] = []
+        self.created: List[float] = []
+        self.last_used: List[float] = []
+
+    def drop(self, idx: List[int]) -> None:
+        keep = [i for i in range(len(self.answers)) if i not in set(idx)]
+        self.matrix = self.matrix[keep]
+        self.questions = [self.questions[i] for i in keep]
+        self.signatures = [self.signatures[i] for i in keep]
+        self.answers = [self.answers[i] for i in keep]
+        self.created = [self.created[i] for i in keep]
+        self.last_used = [self.last_used[i] for i in keep]
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by (scope, question meaning). A scope is typically the
+    hash of the document(s) the question is about, so near-identical
+    questions against the same shared document reuse one completion.
+
+    Lookup is a NumPy cosine search over the scope's embedding matrix; a
+    match must also have the same question_signature (numbers, names,
+    negation), which embeddings alone tend to blur.
+    Eviction: entries expire after `ttl`; each scope keeps at most
+    `max_per_scope` entries (least recently used dropped first); at most
+    `max_scopes` scopes are kept (least recently used dropped first).
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        threshold: float,
+        ttl: float,
+        max_per_scope: int,
+        max_scopes: int,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_scope = max_per_scope
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[str, _Scope]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expire(self, scope: _Scope, now: float) -> None:
+        stale = [i for i, t in enumerate(scope.created) if now - t > self.ttl]
+        if stale:
+            scope.drop(stale)
+            self.evictions += len(stale)
+
+    async def lookup(self, scope_key: str, question: str) -> CacheLookup:
+        emb = await self.embedder.embed(question)
+        scope = self._scopes.get(scope_key)
+        now = time.time()
+        if scope is not None:
+            self._scopes.move_to_end(scope_key)
+            self._expire(scope, now)
+        if scope is None or not scope.answers or scope.matrix.shape[1] != emb.shape[0]:
+            self.misses += 1
+            return CacheLookup(None, 0.0, emb)
+
+        sims = scope.matrix @ emb
+        signature = question_signature(question)
+        # Best match above the threshold that asks about the same specifics.
+        for idx in np.argsort(-sims):
+            similarity = float(sims[idx])
+            if similarity < self.threshold:
+                break
+            if scope.signatures[idx] == signature:
+                scope.last_used[idx] = now
+                self.hits += 1
+                return CacheLookup(scope.answers[idx], similarity, emb)
+        self.misses += 1
+        return CacheLookup(None, float(np.max(sims)), emb)
+
+    def store(self, scope_key: str, question: str, answer: str, embedding: np.ndarray) -> None:
+        if not answer:
+            return
+        scope = self._scopes.get(scope_key)
+        if scope is None:
+            scope = self._scopes[scope_key] = _Scope(embedding.shape[0])
+            while len(self._scopes) > self.max_scopes:
+                _, old = self._scopes.popitem(last=False)
+                self.evictions += len(old.answers)
+        self._scopes.move_to_end(scope_key)
+
+        if len(scope.answers) >= self.max_per_scope:
+            lru = int(np.argmin(scope.last_used))
+            scope.drop([lru])
+            self.evictions += 1
+
+        now = time.time()
+        scope.matrix = np.vstack([scope.matrix, embedding[None, :].astype(np.float32)])
+        scope.questions.append(question)
+        scope.signatures.append(question_signature(question))
+        scope.answers.append(answer)
+        scope.created.append(now)
+        scope.last_used.append(now)
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "scopes": len(self._scopes),
+            "entries": sum(len(s.answers) for s in self._scopes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+        }
+
+
+def _make_embedder() -> Embedder:
+    if SEMANTIC_CACHE_EMBEDDER == "openai":
+        return OpenAIEmbedder(SEMANTIC_CACHE_EMBEDDING_MODEL)
+    return HashingEmbedder()
+
+
+answer_cache = SemanticAnswerCache(
+    _make_embedder(),
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL_SECONDS,
+    max_per_scope=SEMANTIC_CACHE_MAX_PER_SCOPE,
+    max_scopes=SEMANTIC_CACHE_MAX_SCOPES,
+)
@@ -0,0 +1,27 @@
+# app/utils/timing.py
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+
+def timed_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a graph node so its wall-clock time (ms) is recorded in
+    state["node_timings"][name]. Works for both sync and async nodes.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(state):
+        start = time.perf_counter()
+        out = fn(state)
+        if inspect.isawaitable(out):
+            out = await out
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        timings = dict(state.get("node_timings") or {})
+        timings[name] = round(timings.get(name, 0.0) + elapsed_ms, 3)
+        out["node_timings"] = timings
+        return out
+
+    return wrapper
@@ -0,0 +1,23 @@
+# app/utils/tokens.py
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding if it can be loaded (it may need a download), else None."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for `text`; falls back to the ~4 chars/token rule of thumb."""
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
@@ -0,0 +1,70 @@
+# benchmarks/compare.py
+"""
+Compare two result files written by `benchmarks.load --out` or
+`benchmarks.startup --out` and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 if any tracked metric got worse by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Iterator, Tuple
+
+# Metrics where a larger value is better; everything else is "lower is better".
+HIGHER_IS_BETTER = {"throughput_rps"}
+TRACKED = {"p50", "p95", "p99", "mean", "throughput_rps", "import_s", "startup_s", "import_rss_mb", "rss_mb"}
+
+
+def _flatten(obj, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "meta":
+                continue
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        if prefix.rsplit(".", 1)[-1] in TRACKED:
+            yield prefix, float(obj)
+
+
+def compare(base: dict, cand: dict, threshold: float) -> Tuple[list, list]:
+    base_flat = dict(_flatten(base))
+    rows, regressions = [], []
+    for key, new in _flatten(cand):
+        old = base_flat.get(key)
+        if old is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if key.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        rows.append((key, old, new, change))
+        if worse > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        cand = json.load(f)
+
+    rows, regressions = compare(base, cand, args.threshold)
+    for key, old, new, change in rows:
+        flag = "  REGRESSION" if key in regressions else ""
+        print(f"{key:<40} {old:>12.3f} -> {new:>12.3f}  {change:+7.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
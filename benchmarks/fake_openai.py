@@ -0,0 +1,205 @@
+# benchmarks/fake_openai.py
+"""
+Offline stand-in for the OpenAI endpoints the assistant uses:
+
+- POST /v1/chat/completions   (planner / tasks / vision OCR)
+- POST /v1/audio/transcriptions (Whisper)
+
+Latency is modelled as `base latency + completion_tokens / tokens_per_second`
+(+ optional jitter), so throughput and tail behaviour can be studied without
+the network. Run standalone with:
+
+    python -m benchmarks.fake_openai --port 9100 --chat-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+
+@dataclass
+class StubConfig:
+    chat_latency_ms: float = 250.0
+    vision_latency_ms: float = 600.0
+    whisper_latency_ms: float = 800.0
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 60
+    jitter: float = 0.1  # +/- fraction applied to every delay
+    seed: int = 0
+
+
+_PLANNER_USER_RE = re.compile(r"User message:\s*---\s*(.*?)\s*---", re.S)
+
+
+def _plan_for(user_message: str) -> dict:
+    """Deterministic keyword planner so every graph branch gets exercised."""
+    msg = user_message.lower()
+    if "summar" in msg:
+        task = "summary"
+    elif "sentiment" in msg or "tone" in msg:
+        task = "sentiment"
+    elif "code" in msg:
+        task = "code_explanation"
+    elif "transcribe" in msg or "text only" in msg:
+        task = "transcript_only"
+    elif "?" in msg:
+        task = "qa"
+    else:
+        task = "conversation"
+    return {
+        "task": task,
+        "needs_clarification": False,
+        "clarification_question": "",
+        "reasoning": "stub planner",
+    }
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="fake-openai")
+    rng = random.Random(config.seed)
+    app.state.config = config
+    app.state.calls = {"chat": 0, "vision": 0, "whisper": 0}
+
+    async def _sleep(base_ms: float, tokens: int = 0) -> None:
+        delay = base_ms / 1000.0
+        if tokens and config.tokens_per_second > 0:
+            delay += tokens / config.tokens_per_second
+        if config.jitter:
+            delay *= 1.0 + rng.uniform(-config.jitter, config.jitter)
+        await asyncio.sleep(max(delay, 0.0))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        last = messages[-1] if messages else {}
+        content = last.get("content", "")
+
+        if isinstance(content, list):
+            app.state.calls["vision"] += 1
+            await _sleep(config.vision_latency_ms, config.completion_tokens)
+            reply = "Quarterly review. Action items: migrate billing, hire SREs."
+        else:
+            app.state.calls["chat"] += 1
+            if "PLANNER" in content:
+                m = _PLANNER_USER_RE.search(content)
+                reply = json.dumps(_plan_for(m.group(1) if m else ""))
+                await _sleep(config.chat_latency_ms, len(reply) // 4)
+            else:
+                reply = "stub answer " + " ".join(
+                    ["lorem"] * max(config.completion_tokens - 2, 0)
+                )
+                await _sleep(config.chat_latency_ms, config.completion_tokens)
+
+        prompt_tokens = len(json.dumps(messages)) // 4
+        completion_tokens = max(len(reply) // 4, 1)
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        app.state.calls["whisper"] += 1
+        await _sleep(config.whisper_latency_ms, config.completion_tokens)
+        text = "This is a stub transcript of the uploaded call about the quarterly review."
+        if form.get("response_format") == "text":
+            return PlainTextResponse(text)
+        return JSONResponse({"text": text})
+
+    @app.get("/v1/stub/stats")
+    async def stats():
+        return {"config": asdict(config), "calls": app.state.calls}
+
+    return app
+
+
+class StubServer:
+    """Run the stub with uvicorn in a background thread (used by the load generator)."""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 9100):
+        import uvicorn
+
+        self.host = host
+        self.port = port
+        self.app = create_app(config)
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host=host, port=port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake OpenAI server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = StubConfig()
+    parser.add_argument("--chat-latency-ms", type=float, default=defaults.chat_latency_ms)
+    parser.add_argument("--vision-latency-ms", type=float, default=defaults.vision_latency_ms)
+    parser.add_argument("--whisper-latency-ms", type=float, default=defaults.whisper_latency_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def stub_config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        vision_latency_ms=args.vision_latency_ms,
+        whisper_latency_ms=args.whisper_latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(stub_config_from_args(args)), host=args.host, port=args.port)
@@ -0,0 +1,114 @@
+# benchmarks/fixtures.py
+"""
+Synthetic request payloads for the load generator. Everything is generated
+in-process (no binary files checked in, no network).
+"""
+import io
+import struct
+import wave
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# (form fields, optional (filename, bytes, content_type))
+Fixture = Tuple[Dict[str, str], Optional[Tuple[str, bytes, str]]]
+
+SAMPLE_TEXT = (
+    "Quarterly review. Revenue grew 12% while support tickets fell by a third. "
+    "Action items: migrate billing to the new provider, hire two SREs, and "
+    "publish the incident postmortem by Friday. The team is optimistic but "
+    "worried about the hiring timeline."
+)
+
+PROMPTS: Dict[str, List[str]] = {
+    "text": [
+        "Summarize this: " + SAMPLE_TEXT,
+        "What is the sentiment of this note? " + SAMPLE_TEXT,
+        "Hi! How are you today?",
+    ],
+    "pdf": ["Summarize this document.", "What are the action items?"],
+    "image": ["What does this screenshot say?", "Just give me the text only."],
+    "audio": ["Transcribe this recording.", "Summarize this call."],
+}
+
+
+def make_pdf(text: str = SAMPLE_TEXT, pages: int = 2) -> bytes:
+    """Build a small PDF with a real text layer (so no OCR fallback runs)."""
+    objects: List[bytes] = []
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects.append(b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages)
+    for i, pid in enumerate(page_ids):
+        line = f"Page {i + 1}. {text}".replace("(", "[").replace(")", "]")
+        chunks = [line[j : j + 80] for j in range(0, len(line), 80)]
+        ops = "BT /F1 11 Tf 40 760 Td 14 TL " + " ".join(
+            f"({c}) Tj T*" for c in chunks
+        ) + " ET"
+        stream = ops.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (font_id, pid + 1)
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % n + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def make_png(width: int = 64, height: int = 16) -> bytes:
+    """Plain white RGB PNG; the vision stub does not look at the pixels."""
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(
+            ">I", zlib.crc32(body) & 0xFFFFFFFF
+        )
+
+    raw = b"".join(b"\x00" + b"\xff" * (width * 3) for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_wav(seconds: float = 1.0, rate: int = 8000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buf.getvalue()
+
+
+def build_fixtures() -> Dict[str, List[Fixture]]:
+    pdf = ("report.pdf", make_pdf(), "application/pdf")
+    png = ("screenshot.png", make_png(), "image/png")
+    wav = ("call.wav", make_wav(), "audio/wav")
+    return {
+        "text": [({"text": p}, None) for p in PROMPTS["text"]],
+        "pdf": [({"text": p}, pdf) for p in PROMPTS["pdf"]],
+        "image": [({"text": p}, png) for p in PROMPTS["image"]],
+        "audio": [({"text": p}, wav) for p in PROMPTS["audio"]],
+    }
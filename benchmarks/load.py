@@ -0,0 +1,224 @@
+# benchmarks/load.py
+"""
+End-to-end load / latency benchmark for POST /api/chat.
+
+Starts the fake OpenAI server, points the app at it via OPENAI_BASE_URL, and
+drives `app.main:app` in-process (httpx ASGI transport) with a weighted mix of
+text, PDF, image and audio requests. Runs fully offline.
+
+    python -m benchmarks.load --requests 200 --concurrency 16 --out bench.json
+    python -m benchmarks.compare baseline.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks.fake_openai import StubConfig, StubServer, add_stub_arguments, stub_config_from_args
+from benchmarks.fixtures import build_fixtures
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize_latencies(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix: Dict[str, int] = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+async def run_load(
+    app,
+    total: int,
+    concurrency: int,
+    mix: Dict[str, int],
+    seed: int = 0,
+    warmup: int = 2,
+    shared_thread: bool = False,
+) -> dict:
+    import httpx
+
+    fixtures = build_fixtures()
+    unknown = set(mix) - set(fixtures)
+    if unknown:
+        raise SystemExit(f"unknown fixture kinds in --mix: {sorted(unknown)}")
+
+    rng = random.Random(seed)
+    kinds = [k for k, w in mix.items() for _ in range(w)]
+    plan = [rng.choice(kinds) for _ in range(total)]
+
+    records: List[dict] = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    # The ASGI transport does not send lifespan events, so run startup here.
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+
+        async def one(kind: str, record: bool = True) -> None:
+            fields, file = rng.choice(fixtures[kind])
+            data = dict(fields)
+            data["thread_id"] = "bench-thread" if shared_thread else uuid.uuid4().hex
+            files = {"file": file} if file else None
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post("/api/chat", data=data, files=files)
+                    status = resp.status_code
+                    body = resp.json() if status == 200 else {}
+                except Exception as e:  # transport-level failure
+                    status, body = 0, {"error": repr(e)}
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if record:
+                records.append(
+                    {
+                        "kind": kind,
+                        "status": status,
+                        "latency_ms": elapsed_ms,
+                        "timings": body.get("timings", {}),
+                    }
+                )
+
+        for kind in list(mix)[:warmup]:
+            await one(kind, record=False)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(kind) for kind in plan))
+        duration = time.perf_counter() - started
+
+    ok = [r for r in records if r["status"] == 200]
+    by_kind: Dict[str, List[float]] = defaultdict(list)
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    for r in ok:
+        by_kind[r["kind"]].append(r["latency_ms"])
+        for node, ms in r["timings"].items():
+            nodes[node].append(ms)
+
+    errors: Dict[str, int] = defaultdict(int)
+    for r in records:
+        if r["status"] != 200:
+            errors[str(r["status"])] += 1
+
+    return {
+        "summary": {
+            "requests": len(records),
+            "ok": len(ok),
+            "errors": dict(errors),
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(len(ok) / duration, 3) if duration else 0.0,
+            "latency_ms": summarize_latencies([r["latency_ms"] for r in ok]),
+        },
+        "by_kind": {k: summarize_latencies(v) for k, v in sorted(by_kind.items())},
+        "nodes": {k: summarize_latencies(v) for k, v in sorted(nodes.items())},
+    }
+
+
+def print_report(results: dict) -> None:
+    s = results["summary"]
+    lat = s["latency_ms"]
+    print(
+        f"requests={s['requests']} ok={s['ok']} errors={s['errors']} "
+        f"duration={s['duration_s']}s throughput={s['throughput_rps']} req/s"
+    )
+    print(f"latency ms: p50={lat.get('p50')} p95={lat.get('p95')} p99={lat.get('p99')}")
+    for section in ("by_kind", "nodes"):
+        print(f"\n{section}:")
+        for name, st in results[section].items():
+            print(
+                f"  {name:<16} n={st['count']:<5} p50={st['p50']:<10} "
+                f"p95={st['p95']:<10} p99={st['p99']}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load benchmark for /api/chat")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default="text=4,pdf=2,image=2,audio=1")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--shared-thread", action="store_true", help="send every request on one thread_id")
+    parser.add_argument("--port", type=int, default=9100, help="port for the fake OpenAI server")
+    parser.add_argument("--out", help="write machine-readable results (JSON) here")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub_config: StubConfig = stub_config_from_args(args)
+    mix = parse_mix(args.mix)
+
+    with StubServer(stub_config, port=args.port) as stub:
+        # Must be set before app.* is imported: the OpenAI clients read it at import time.
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+        from app.main import app
+
+        results = asyncio.run(
+            run_load(
+                app,
+                total=args.requests,
+                concurrency=args.concurrency,
+                mix=mix,
+                seed=args.seed,
+                warmup=args.warmup,
+                shared_thread=args.shared_thread,
+            )
+        )
+
+    results["meta"] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "stub": vars(stub_config),
+    }
+
+    print_report(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
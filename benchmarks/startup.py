@@ -0,0 +1,109 @@
+# benchmarks/startup.py
+"""
+Cold-start benchmark: time to `import app.main`, time to run the app's
+startup (lifespan), and RSS after each phase. Every sample runs in a fresh
+interpreter so module caches don't leak between runs.
+
+    python -m benchmarks.startup --repeat 5 --out startup.json
+    python -m benchmarks.compare startup_before.json startup.json
+
+Run it on two commits to compare before/after a change.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# Modules that should only be loaded once a request actually needs them.
+HEAVY_MODULES = ["openai", "pdfplumber", "pdf2image", "pytesseract", "youtube_transcript_api", "langgraph"]
+
+_PROBE = r"""
+import asyncio, json, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+heavy = json.loads(sys.argv[1])
+base_rss = rss_mb()
+
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+import_rss = rss_mb()
+loaded_after_import = [m for m in heavy if m in sys.modules]
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        pass
+
+t2 = time.perf_counter()
+asyncio.run(startup())
+t3 = time.perf_counter()
+
+print(json.dumps({
+    "import_s": t1 - t0,
+    "startup_s": t3 - t2,
+    "base_rss_mb": base_rss,
+    "import_rss_mb": import_rss,
+    "startup_rss_mb": rss_mb(),
+    "loaded_after_import": loaded_after_import,
+    "loaded_after_startup": [m for m in heavy if m in sys.modules],
+}))
+"""
+
+
+def sample() -> dict:
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "startup-benchmark"))
+    out = subprocess.check_output(
+        [sys.executable, "-c", _PROBE, json.dumps(HEAVY_MODULES)], env=env, text=True
+    )
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start import/startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write machine-readable results (JSON) here")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.repeat)]
+    median = lambda key: round(statistics.median(s[key] for s in samples), 4)  # noqa: E731
+
+    results = {
+        "startup": {
+            "import_s": median("import_s"),
+            "startup_s": median("startup_s"),
+            "import_rss_mb": median("import_rss_mb"),
+            "rss_mb": median("startup_rss_mb"),
+        },
+        "loaded_after_import": samples[-1]["loaded_after_import"],
+        "loaded_after_startup": samples[-1]["loaded_after_startup"],
+        "meta": {"repeat": args.repeat, "python": platform.python_version()},
+    }
+
+    s = results["startup"]
+    print(f"import:  {s['import_s']:.3f}s  rss {s['import_rss_mb']:.1f} MB")
+    print(f"startup: {s['startup_s']:.3f}s  rss {s['rss_mb']:.1f} MB")
+    print(f"heavy modules after import:  {results['loaded_after_import']}")
+    print(f"heavy modules after startup: {results['loaded_after_startup']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
+import hashlib
 import uuid
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 
 API_BASE = "http://localhost:8000"
 API_CHAT = f"{API_BASE}/api/chat"
+API_FILES = f"{API_BASE}/api/files"
+
+# (connect, read) timeouts in seconds; OCR/transcription turns can be slow.
+UPLOAD_TIMEOUT = (5, 120)
+CHAT_TIMEOUT = (5, 300)
 
 st.set_page_config(page_title="Agentic Assistant", page_icon="💬", layout="centered")
 
@@ -22,6 +29,41 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+@st.cache_resource
+def get_http() -> requests.Session:
+    """One pooled HTTP session reused across reruns (keep-alive to the backend)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def upload_once(uploaded_file) -> str:
+    """
+    Upload a file to the backend the first time we see it in this session and
+    remember its file_id; later messages only send the id.
+    """
+    data = uploaded_file.getvalue()
+    key = hashlib.sha256(data).hexdigest()
+    file_ids = st.session_state.file_ids
+    if key not in file_ids:
+        resp = get_http().post(
+            API_FILES,
+            files={
+                "file": (
+                    uploaded_file.name,
+                    data,
+                    uploaded_file.type or "application/octet-stream",
+                )
+            },
+            timeout=UPLOAD_TIMEOUT,
+        )
+        resp.raise_for_status()
+        file_ids[key] = resp.json()["file_id"]
+    return file_ids[key]
+
+
 # ---------- SESSION STATE ----------
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
@@ -30,6 +72,10 @@ if "messages" not in st.session_state:
     # for UI only: [{"role": "user"|"assistant", "content": str}]
     st.session_state.messages = []
 
+if "file_ids" not in st.session_state:
+    # sha256 of uploaded bytes -> backend file_id
+    st.session_state.file_ids = {}
+
 
 # ---------- HEADER ----------
 st.title("💬 Agentic Assistant")
@@ -52,10 +98,15 @@ for msg in st.session_state.messages:
 # ---------- INPUT AREA ----------
 uploaded_file = st.file_uploader(
     "Attach a file (optional)",
-    type=["png", "jpg", "jpeg", "pdf", "mp3", "wav", "m4a"],
+    type=["png", "jpg", "jpeg", "webp", "pdf", "docx", "txt", "md", "csv", "mp3", "wav", "m4a"],
     label_visibility="collapsed",
 )
 
+use_all_docs = st.checkbox(
+    "Use all documents from this chat",
+    help="By default the latest upload is used; tick to ask across every document so far.",
+)
+
 user_input = st.chat_input("Type your message here (you can also attach a file above)")
 
 # IMPORTANT CHANGE:
@@ -86,19 +137,13 @@ if user_input is not None:
             data = {"thread_id": st.session_state.thread_id}
             if user_input.strip():
                 data["text"] = user_input
-
-            files = None
-            if uploaded_file is not None:
-                files = {
-                    "file": (
-                        uploaded_file.name,
-                        uploaded_file.getvalue(),
-                        uploaded_file.type or "application/octet-stream",
-                    )
-                }
+            if use_all_docs:
+                data["doc_ids"] = "all"
 
             try:
-                resp = requests.post(API_CHAT, data=data, files=files)
+                if uploaded_file is not None:
+                    data["file_id"] = upload_once(uploaded_file)
+                resp = get_http().post(API_CHAT, data=data, timeout=CHAT_TIMEOUT)
             except Exception as e:
                 assistant_text = f"❌ Could not reach backend: `{e}`"
                 st.markdown(assistant_text)
@@ -134,6 +179,8 @@ if user_input is not None:
             if result:
                 parts.append("**Response:**")
                 parts.append(result)
+                if data.get("cached"):
+                    parts.append("_Answered from cache (similar question asked before)._")
             elif clar_q:
                 parts.append("**Clarification:**")
                 parts.append(clar_q)
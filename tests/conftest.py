@@ -0,0 +1,111 @@
+# tests/conftest.py
+"""
+Shared setup: the app talks to the bundled fake OpenAI server
+(benchmarks/fake_openai.py) and stores uploads in a temp dir. Both must be
+configured before any app.* module is imported, since config is read at
+import time.
+"""
+import asyncio
+import os
+import socket
+import tempfile
+
+import httpx
+import pytest
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+STUB_PORT = _free_port()
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+os.environ["OPENAI_API_KEY"] = "test"
+os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="uploads-")
+
+from benchmarks.fake_openai import StubConfig, StubServer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def stub():
+    config = StubConfig(
+        chat_latency_ms=20,
+        vision_latency_ms=20,
+        whisper_latency_ms=300,
+        tokens_per_second=0,
+        jitter=0,
+    )
+    with StubServer(config, port=STUB_PORT) as server:
+        yield server
+
+
+class Api:
+    """Requests against the app in-process, each inside its lifespan."""
+
+    def __init__(self, run):
+        self._run = run
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        return self._run(self._request("POST", path, **kwargs))
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self._run(self._request("GET", path, **kwargs))
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                return await c.request(method, path, **kwargs)
+
+
+@pytest.fixture
+def api(stub, run):
+    """The app over HTTP, backed by the fake OpenAI server."""
+    return Api(run)
+
+
+@pytest.fixture
+def progressive_audio(monkeypatch):
+    """Every audio upload goes progressive, one Whisper call per second of audio."""
+    import app.extractors.registry as registry
+    import app.graph as graph
+
+    monkeypatch.setattr(graph, "PROGRESSIVE_MIN_BYTES", 0)
+    monkeypatch.setattr(registry, "PROGRESSIVE_AUDIO_SEGMENT_SECONDS", 1.0)
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion (the suite has no async test plugin)."""
+    from app.utils.llm import get_client
+
+    def run(coro):
+        # The shared OpenAI client's connection pool belongs to one event loop.
+        get_client.cache_clear()
+        return asyncio.run(coro)
+
+    return run
+
+
+class FakeRequest:
+    """
+    Stands in for starlette's Request in _run_turn: reports a disconnect once
+    `after` seconds have passed and the optional async `until()` is true.
+    """
+
+    def __init__(self, after: float = 0.0, until=None):
+        self._deadline = None
+        self.after = after
+        self.until = until
+
+    async def is_disconnected(self) -> bool:
+        loop = asyncio.get_running_loop()
+        if self._deadline is None:
+            self._deadline = loop.time() + self.after
+        if loop.time() < self._deadline:
+            return False
+        return self.until is None or bool(await self.until())
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import AdmissionController, QueueFull
+
+
+def _controller(max_concurrent: int, max_queue: int) -> AdmissionController:
+    return AdmissionController(max_concurrent, max_queue, queue_timeout=5, resource_limits={})
+
+
+async def _burst(ctl: AdmissionController, thread_ids, hold: float = 0.05):
+    async def one(thread_id):
+        try:
+            async with ctl.admit(thread_id):
+                await asyncio.sleep(hold)
+            return "ok"
+        except QueueFull:
+            return "full"
+
+    return await asyncio.gather(*(one(t) for t in thread_ids))
+
+
+def test_burst_admits_running_plus_queued(run):
+    ctl = _controller(max_concurrent=1, max_queue=2)
+    results = run(_burst(ctl, [f"t{i}" for i in range(6)]))
+    assert results.count("ok") == 3
+    assert results.count("full") == 3
+    assert ctl.waiting == 0 and ctl.in_flight == 0
+
+
+def test_queue_size_zero_still_serves_an_idle_server(run):
+    ctl = _controller(max_concurrent=2, max_queue=0)
+    assert run(_burst(ctl, ["a"])) == ["ok"]
+    # Two free slots: both run, nothing queues.
+    assert run(_burst(ctl, ["a", "b"])) == ["ok", "ok"]
+    # A third has to wait, and the queue is zero.
+    assert sorted(run(_burst(ctl, ["a", "b", "c"]))) == ["full", "ok", "ok"]
+
+
+def test_same_thread_turns_queue_without_rejection(run):
+    ctl = _controller(max_concurrent=4, max_queue=2)
+    assert run(_burst(ctl, ["same"] * 3)) == ["ok", "ok", "ok"]
+
+
+def test_same_thread_turns_run_in_order(run):
+    ctl = _controller(max_concurrent=4, max_queue=8)
+    order = []
+
+    async def turn(i):
+        async with ctl.admit("ordered"):
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async def go():
+        await asyncio.gather(*(turn(i) for i in range(5)))
+
+    run(go())
+    assert order == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("max_queue", [0, 1])
+def test_full_queue_rejects_the_overflow(run, max_queue):
+    ctl = _controller(max_concurrent=1, max_queue=max_queue)
+    results = run(_burst(ctl, [f"t{i}" for i in range(max_queue + 3)]))
+    assert results.count("ok") == max_queue + 1
+    assert ctl.rejected == 2
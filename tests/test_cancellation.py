@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.main import _prepare_state, _run_turn, app
+from app.utils.cancellation import cancellations
+from app.utils.file_store import file_store
+from benchmarks.fixtures import make_wav
+from tests.conftest import FakeRequest
+
+
+@pytest.mark.parametrize("delay", [0.0, 0.3])
+def test_disconnect_mid_extraction_then_next_turn_succeeds(stub, run, progressive_audio, delay):
+    stored = file_store.put(make_wav(seconds=6), "call.wav", "audio/wav")
+    thread_id = f"disconnect-{delay}"
+    config = {"configurable": {"thread_id": thread_id}}
+
+    async def extract_checkpointed() -> bool:
+        snapshot = await app.state.agent_app.aget_state(config)
+        return bool(snapshot.values.get("extraction_job"))
+
+    async def go():
+        async with app.router.lifespan_context(app):
+            state = await _prepare_state(
+                "Transcribe this recording.", thread_id, None, stored.file_id, None
+            )
+            # Disconnect after the extract node is checkpointed, while batches
+            # are still being transcribed (6 segments x 300 ms in the stub).
+            request = FakeRequest(delay, until=extract_checkpointed)
+            with pytest.raises(HTTPException) as exc:
+                await _run_turn(app, state, request)
+            assert exc.value.status_code == 499
+
+            snapshot = await app.state.agent_app.aget_state(config)
+            assert snapshot.values.get("extraction_job")
+
+            state = await _prepare_state("hello there", thread_id, None, None, None)
+            return await asyncio.wait_for(_run_turn(app, state), 10)
+
+    jobs_before = cancellations.snapshot()["extraction_jobs"]
+    response = run(go())
+    assert response.result.startswith("stub answer")
+    assert any("Progressive extraction dropped" in line for line in response.logs)
+    assert cancellations.snapshot()["extraction_jobs"] == jobs_before + 1
+
+
+def test_cancelled_job_does_not_reraise_cancellation(run):
+    from app.extractors.progressive import ExtractionCancelled, start_job
+
+    async def slow_source():
+        yield "first"
+        await asyncio.sleep(10)
+        yield "never"
+
+    async def go():
+        job = start_job(slow_source())
+        assert await job.first_batch() == "first"
+        job.cancel()
+        with pytest.raises(ExtractionCancelled):
+            await job.full_text()
+        assert job.cancelled and job.error is None and not job.usable
+
+    run(go())
@@ -0,0 +1,80 @@
+import pytest
+
+from app.utils.compaction import compact_text
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("text compac-\ntion works", "text compaction works"),
+        ("more infor-\nmation here", "more information here"),
+        ("the com-\npany grew", "the company grew"),
+        ("we con-\ntinue today", "we continue today"),
+    ],
+)
+def test_split_word_is_rejoined(raw, expected):
+    assert compact_text(raw).text == expected
+
+
+def test_compound_keeps_its_hyphen():
+    assert compact_text("a well-\nknown result").text == "a well-known result"
+
+
+def test_document_vocabulary_decides_the_hyphen():
+    # The document writes "re-enter" and "cooperate" elsewhere: follow it.
+    raw = "please re-enter it\nthen re-\nenter again; we co-\noperate as we cooperate"
+    assert compact_text(raw).text == (
+        "please re-enter it\nthen re-enter again; we cooperate as we cooperate"
+    )
+    raw = "the data set is big\nthis data-\nset is bigger"
+    assert compact_text(raw).text == "the data set is big\nthis data-set is bigger"
+
+
+def test_skipped_duplicate_line_ends_the_hyphenation():
+    dup = "this line is long enough to be deduplicated"
+    raw = f"{dup}\nsome hyphen-\n{dup}\nnext words"
+    assert compact_text(raw).text == f"{dup}\nsome hyphen-\nnext words"
+
+
+def test_skipped_furniture_line_ends_the_hyphenation():
+    bodies = ["alpha ends with hyphen-", "beta words", "gamma words", "delta words"]
+    pages = [f"Quarterly report\n{body}\nPage {n} of 4" for n, body in enumerate(bodies, 1)]
+    c = compact_text("\f".join(pages))
+    assert c.furniture_lines == 8
+    assert c.text == "alpha ends with hyphen-\nbeta words\ngamma words\ndelta words"
+
+
+def test_rows_that_differ_only_in_numbers_survive_dedupe():
+    raw = "Widget order total 1,200 EUR\nWidget order total 1,300 EUR\nWidget order total 1,200 EUR"
+    c = compact_text(raw)
+    assert c.text == "Widget order total 1,200 EUR\nWidget order total 1,300 EUR"
+    assert c.duplicate_lines == 1
+
+
+def test_offsets_point_into_the_raw_text():
+    raw = "first   line\n\n\nsecond compac-\ntion line"
+    c = compact_text(raw)
+    assert c.text == "first line\n\nsecond compaction line"
+    for word in ("first", "line", "second", "compac", "tion"):
+        start = c.text.index(word, c.text.index("second") if word == "tion" else 0)
+        lo, hi = c.offsets.span(start, start + len(word))
+        assert raw[lo:hi] == word
+
+
+def test_registry_keeps_the_raw_text_for_the_offset_map():
+    from app.utils.documents import DocumentRegistry
+
+    registry = DocumentRegistry(max_threads=4)
+    raw = "scanned   report\n\n\nthe compac-\ntion step"
+    doc = registry.add("t1", raw, "pdf")
+    registry.apply_compaction(doc, compact_text(raw))
+
+    assert registry.text(doc) == raw
+    assert registry.joined_text("t1", [doc.doc_id], raw=True) == raw
+    prompt = registry.prompt_text(doc)
+    assert prompt == registry.joined_text("t1", [doc.doc_id])
+    assert prompt == "scanned report\n\nthe compaction step"
+
+    start = prompt.index("compaction")
+    lo, hi = registry.original_span(doc, start, start + len("compaction"))
+    assert registry.text(doc)[lo:hi] == "compac-\ntion"
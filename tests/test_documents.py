@@ -0,0 +1,41 @@
+import threading
+
+import app.graph as graph
+from app.utils.documents import DocumentRegistry
+
+
+def test_unknown_doc_ids_is_an_error(api):
+    data = {"text": "Summarize it", "thread_id": "docs-empty", "doc_ids": "deadbeef"}
+    r = api.post("/api/chat", data=data)
+    assert r.status_code == 404
+    assert "deadbeef" in r.json()["detail"]
+
+
+def test_unresolved_names_the_missing_parts():
+    registry = DocumentRegistry(max_threads=4)
+    doc = registry.add("t", "Quarterly memo text.", "text", "memo.txt")
+    assert registry.unresolved("t", f"{doc.doc_id[:8]}, memo.txt") == []
+    assert registry.unresolved("t", "memo.txt, other.txt") == ["other.txt"]
+    assert registry.unresolved("t", "latest") == []
+    assert registry.unresolved("empty", "latest") == []
+    assert registry.unresolved("empty", "all") == []
+
+
+def test_all_on_a_fresh_thread_is_not_an_error(api):
+    r = api.post("/api/chat", data={"text": "Hello", "thread_id": "docs-fresh", "doc_ids": "all"})
+    assert r.status_code == 200
+
+
+def test_documents_are_tokenized_off_the_event_loop(api, monkeypatch):
+    threads = []
+    count = graph.count_tokens
+
+    def spy(text):
+        threads.append(threading.current_thread())
+        return count(text)
+
+    monkeypatch.setattr(graph, "count_tokens", spy)
+    files = {"file": ("memo.txt", b"Quarterly memo: revenue grew.", "text/plain")}
+    r = api.post("/api/chat", data={"text": "Summarize it", "thread_id": "docs-tokens"}, files=files)
+    assert r.status_code == 200
+    assert threads and all(t is not threading.main_thread() for t in threads)
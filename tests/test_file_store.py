@@ -0,0 +1,59 @@
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+import app.main as main
+from app.utils.file_store import FileStore
+
+
+def _age(store: FileStore, file_id: str, seconds_ago: float) -> None:
+    path = os.path.join(store.root, f"{file_id}.json")
+    t = os.path.getmtime(path) - seconds_ago
+    os.utime(path, (t, t))
+
+
+def test_least_recently_used_files_go_over_the_cap(tmp_path):
+    store = FileStore(str(tmp_path), max_total_bytes=10_000)
+    a = store.put(b"a" * 4000, "a.bin", "")
+    b = store.put(b"b" * 4000, "b.bin", "")
+    _age(store, a.file_id, 20)
+    _age(store, b.file_id, 10)
+    store.get_meta(a.file_id)  # a is used again; b is now the oldest
+
+    c = store.put(b"c" * 4000, "c.bin", "")
+    assert store.get_meta(b.file_id) is None
+    assert store.read_bytes(a.file_id) and store.read_bytes(c.file_id)
+    assert store.evicted == 1
+
+
+def test_expired_files_are_dropped_with_their_extraction(tmp_path):
+    store = FileStore(str(tmp_path), max_age_seconds=60)
+    old = store.put(b"old file", "old.txt", "text/plain")
+    store.put_extraction(old.file_id, "old file")
+    _age(store, old.file_id, 120)
+
+    new = store.put(b"new file", "new.txt", "text/plain")
+    assert sorted(os.listdir(tmp_path)) == [f"{new.file_id}.bin", f"{new.file_id}.json"]
+    store.put_extraction(old.file_id, "late result")
+    assert store.get_extraction(old.file_id) is None
+
+
+def test_the_file_just_stored_is_kept(tmp_path):
+    store = FileStore(str(tmp_path), max_total_bytes=100)
+    big = store.put(b"x" * 500, "big.bin", "")
+    assert store.read_bytes(big.file_id) == b"x" * 500
+
+
+def test_oversized_upload_stops_reading_at_the_limit(run, monkeypatch):
+    chunk = main._UPLOAD_CHUNK_BYTES
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", chunk + chunk // 2)
+    body = io.BytesIO(b"z" * chunk * 5)
+    upload = UploadFile(body, filename="big.bin")  # no size: read in chunks
+
+    with pytest.raises(HTTPException) as e:
+        run(main._store_upload(upload))
+    assert e.value.status_code == 413
+    assert body.tell() == 2 * chunk
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+
+import app.graph as graph
+from app.extractors.progressive import start_job
+from app.tasks.qa import PassageRetriever
+from app.utils.cancellation import cancellations
+from app.utils.progress import close_channel, open_channel
+from app.utils.router import routed_call
+from benchmarks.fixtures import make_wav
+
+BATCHES = [
+    "Page one covers the budget and the hiring plan.",
+    "Page two lists the launch date: the launch moves to March.",
+    "Page three is the appendix with the glossary.",
+]
+
+
+async def _source(delay: float = 0.02):
+    for batch in BATCHES:
+        await asyncio.sleep(delay)
+        yield batch
+
+
+async def _with_channel(make_coro):
+    token, queue = open_channel()
+    try:
+        result = await make_coro()
+    finally:
+        close_channel(token)
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return result, events
+
+
+def test_progressive_summary_streams_one_part_per_batch(stub, run):
+    async def go():
+        job = start_job(_source())
+        return await _with_channel(lambda: graph._progressive_summary(job))
+
+    result, events = run(go())
+    assert result.startswith("stub answer")
+    assert sorted(e["part"] for e in events if e["node"] == "summary") == [1, 2, 3]
+
+
+def test_progressive_answer_sends_an_early_answer_then_the_final(stub, run):
+    async def go():
+        # Batches slower than a stub call, so the early answer lands first.
+        job = start_job(_source(delay=0.3))
+        state = {"thread_id": "progressive-qa", "active_doc_ids": []}
+        return await _with_channel(
+            lambda: graph._progressive_answer(state, job, "When is the launch?")
+        )
+
+    result, events = run(go())
+    assert result.startswith("stub answer")
+    early = [e for e in events if e["node"] == "qa"]
+    assert len(early) == 1 and early[0]["early"] is True
+
+
+def test_retriever_scores_passages_off_the_event_loop(run, monkeypatch):
+    retriever = PassageRetriever("When is the launch?", top_k=1)
+    threads = []
+    vector = retriever._embedder.vector
+
+    def spy(text):
+        threads.append(threading.current_thread())
+        return vector(text)
+
+    monkeypatch.setattr(retriever._embedder, "vector", spy)
+    for batch in BATCHES:
+        run(retriever.add(batch))
+    assert "launch moves to March" in retriever.context()
+    assert threads and all(t is not threading.main_thread() for t in threads)
+
+
+def test_stream_endpoint_sends_partials_then_the_final_response(api, progressive_audio):
+    files = {"file": ("call.wav", make_wav(seconds=3), "audio/wav")}
+    data = {"text": "Summarize this call", "thread_id": "stream"}
+    r = api.post("/api/chat/stream", data=data, files=files)
+    events = [json.loads(line) for line in r.text.splitlines()]
+    partials, final = events[:-1], events[-1]
+    assert final["type"] == "final", final
+    assert final["response"]["result"].startswith("stub answer")
+    assert partials and all(e["type"] == "partial" for e in partials)
+    assert sorted(e["part"] for e in partials if e["node"] == "summary") == [1, 2, 3]
+
+
+def _slow_first_answer(monkeypatch):
+    """answer_question whose first (early) call takes a second, via routed_call."""
+    calls = []
+
+    async def answer(context, question):
+        calls.append(question)
+        delay = 1.0 if len(calls) == 1 else 0.0
+        return await routed_call("qa", lambda model: asyncio.sleep(delay, result="answer"))
+
+    monkeypatch.setattr(graph, "answer_question", answer)
+
+
+def test_superseded_early_answer_is_not_counted_as_cancelled(run, monkeypatch):
+    _slow_first_answer(monkeypatch)
+
+    async def go():
+        job = start_job(_source(delay=0.0))
+        state = {"thread_id": "progressive-cleanup", "active_doc_ids": []}
+        result, events = await _with_channel(
+            lambda: graph._progressive_answer(state, job, "When is the launch?")
+        )
+        await asyncio.sleep(0.05)  # let the early task finish cancelling
+        return result, events
+
+    before = cancellations.snapshot()["llm_calls"]
+    result, events = run(go())
+    assert result == "answer" and events == []
+    assert cancellations.snapshot()["llm_calls"] == before
+
+
+def test_cancelled_turn_counts_the_early_answer(run, monkeypatch):
+    _slow_first_answer(monkeypatch)
+
+    async def go():
+        job = start_job(_source(delay=0.5))
+        state = {"thread_id": "progressive-cancel", "active_doc_ids": []}
+        token, _ = open_channel()
+        try:
+            task = asyncio.create_task(graph._progressive_answer(state, job, "When?"))
+        finally:
+            close_channel(token)
+        await asyncio.sleep(0.7)  # early answer in flight, batch 2 pending
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        job.cancel()
+
+    before = cancellations.snapshot()["llm_calls"]
+    run(go())
+    assert cancellations.snapshot()["llm_calls"] == before + 1
@@ -0,0 +1,58 @@
+import io
+import threading
+import zipfile
+from typing import get_args
+
+import pytest
+
+import app.extractors.registry as registry
+from app.extractors.registry import extractor_registry, sniff_kind
+from app.models import ExtractionResult
+
+
+def _docx(text: str) -> bytes:
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    xml = f'<w:document xmlns:w="{ns}"><w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>'
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", xml)
+    return buf.getvalue()
+
+
+def test_kind_comes_from_the_bytes_not_the_label():
+    assert sniff_kind(b"%PDF-1.7\n...", "scan.png", "image/png") == "pdf"
+    assert sniff_kind(_docx("hi"), "report.docx") == "docx"
+    assert sniff_kind("naïve café notes".encode(), "notes.bin", "application/octet-stream") == "text"
+    assert sniff_kind(b"\x00\x01\x02", "blob.bin") == "unknown"
+
+
+def test_builtin_source_types_are_valid_extraction_results():
+    allowed = set(get_args(ExtractionResult.model_fields["source_type"].annotation))
+    for kind in ("text", "docx", "pdf", "png", "wav"):
+        assert extractor_registry.find(kind).source_type in allowed
+
+
+def test_text_and_docx_decode_off_the_event_loop(run, monkeypatch):
+    threads = []
+    decode = registry._decode_text
+
+    def spy(data):
+        threads.append(threading.current_thread())
+        return decode(data)
+
+    monkeypatch.setattr(registry, "_decode_text", spy)
+    text_plan = extractor_registry.plan(b"plain notes\n", 12, "notes.txt")
+    docx_plan = extractor_registry.plan(_docx("Quarterly memo"), 200, "memo.docx")
+
+    assert run(text_plan.extractor.extract(b"plain notes\n", "notes.txt", "text")) == "plain notes"
+    assert run(docx_plan.extractor.extract(_docx("Quarterly memo"), "memo.docx", "docx")) == "Quarterly memo"
+    assert threads and all(t is not threading.main_thread() for t in threads)
+
+
+def test_docx_that_inflates_past_the_limit_is_refused(monkeypatch):
+    monkeypatch.setattr(registry, "MAX_UPLOAD_BYTES", 10_000)
+    data = _docx("x" * 20_000)
+    assert len(data) < 10_000  # compresses well
+    with pytest.raises(ValueError, match="expands to"):
+        registry._docx_text(data)
+    assert registry._docx_text(_docx("small")) == "small"
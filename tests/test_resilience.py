@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+
+import httpx
+import openai
+import pytest
+
+import app.main as main
+import app.utils.resilience as resilience
+from app.utils.resilience import (
+    CircuitBreaker,
+    is_retryable,
+    reset_request_deadline,
+    resilient_call,
+    set_request_deadline,
+)
+from app.utils.router import routed_call
+
+
+def _status_error(code: int) -> openai.APIStatusError:
+    response = httpx.Response(code, request=httpx.Request("POST", "http://stub/v1/chat/completions"))
+    return openai.APIStatusError("upstream said no", response=response, body=None)
+
+
+@pytest.mark.parametrize(
+    "exc, retryable",
+    [
+        (asyncio.TimeoutError(), True),
+        (openai.APIConnectionError(request=httpx.Request("POST", "http://stub")), True),
+        (_status_error(429), True),
+        (_status_error(408), True),
+        (_status_error(503), True),
+        (_status_error(400), False),
+        (_status_error(401), False),
+        (ValueError("bad json"), False),
+    ],
+)
+def test_retry_classification(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def test_transient_failure_is_retried(run):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise _status_error(503)
+        return "ok"
+
+    assert run(resilient_call("test:flaky", flaky)) == "ok"
+    assert len(calls) == 2
+    assert resilience._ops["test:flaky"].retries == 1
+
+
+def test_backoff_stops_at_the_turn_deadline(run, monkeypatch):
+    # Backoff sleeps of up to 5 s would overshoot a 0.3 s turn deadline.
+    monkeypatch.setattr(resilience, "RETRY_BASE_SECONDS", 5.0)
+    monkeypatch.setattr(resilience, "RETRY_MAX_SECONDS", 5.0)
+    random.seed(0)
+    calls = []
+
+    async def always_busy():
+        calls.append(1)
+        raise _status_error(503)
+
+    async def go():
+        token = set_request_deadline(0.3)
+        try:
+            await resilient_call("test:busy", always_busy)
+        finally:
+            reset_request_deadline(token)
+
+    started = time.monotonic()
+    with pytest.raises((openai.APIStatusError, asyncio.TimeoutError)):
+        run(go())
+    assert time.monotonic() - started < 0.5
+    assert calls
+
+
+def test_hedge_first_result_wins_and_loser_is_cancelled(run, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY_SECONDS", 0.05)
+    started, cancelled = [], []
+
+    async def call():
+        n = len(started)
+        started.append(n)
+        try:
+            await asyncio.sleep(1.0 if n == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return f"attempt {n}"
+
+    async def go():
+        result = await resilient_call("test:hedge", call, hedge=True)
+        await asyncio.sleep(0)  # let the loser's cancellation land
+        return result
+
+    assert run(go()) == "attempt 1"
+    assert cancelled == [0]
+    assert resilience._ops["test:hedge"].hedge_wins == 1
+
+
+def test_breaker_open_half_open_closed():
+    breaker = CircuitBreaker(threshold=2, reset_after=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()  # the one trial call
+    assert not breaker.allow()
+    breaker.record_failure()  # trial failed: open again
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_no_fallback_after_the_turn_deadline(run):
+    models = []
+
+    async def slow(model):
+        models.append(model)
+        await asyncio.sleep(1.0)
+
+    async def go():
+        token = set_request_deadline(0.1)
+        try:
+            await routed_call("code_explainer", slow)
+        finally:
+            reset_request_deadline(token)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(go())
+    assert len(models) == 1
+    fallback_ops = [op for op in resilience._ops if op.startswith("code_explainer:")]
+    assert fallback_ops == [f"code_explainer:{models[0]}"]
+
+
+def test_turn_past_the_deadline_is_a_504(api, monkeypatch):
+    monkeypatch.setattr(main, "REQUEST_DEADLINE_SECONDS", 0.005)
+    r = api.post("/api/chat", data={"text": "Hello", "thread_id": "deadline"})
+    assert r.status_code == 504
+    assert int(r.headers["Retry-After"]) >= 1
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+
+import app.utils.resilience as resilience
+from app.utils.config import OPENAI_FAST_MODEL, OPENAI_MODEL, OPENAI_STRONG_MODEL
+from app.utils.router import (
+    ROUTES,
+    get_model_trace,
+    reset_model_trace,
+    routed_call,
+    select_model,
+    start_model_trace,
+)
+
+
+def test_select_model_size_tiers():
+    assert select_model("summary", 1_000).model == OPENAI_MODEL
+    assert select_model("summary", 60_001).model == OPENAI_STRONG_MODEL
+    assert select_model("planner", 1_000_000).model == OPENAI_FAST_MODEL
+    assert select_model("no-such-step").model == OPENAI_MODEL
+
+
+@pytest.mark.parametrize(
+    "step", ["planner", "sentiment", "summary", "qa", "conversation", "code_explainer", "ocr"]
+)
+def test_every_chat_step_falls_back_to_a_different_model(step):
+    route = ROUTES[step]
+    assert route.fallback and route.fallback != route.model
+
+
+async def _traced(step, make_call):
+    token = start_model_trace()
+    try:
+        result = await routed_call(step, make_call)
+        return result, get_model_trace()
+    finally:
+        reset_model_trace(token)
+
+
+def test_timeout_falls_back_and_is_traced(run, monkeypatch):
+    route = ROUTES["planner"]
+    monkeypatch.setitem(ROUTES, "planner", replace(route, timeout=0.05))
+
+    async def call(model):
+        if model == route.model:
+            await asyncio.sleep(1.0)
+        return f"from {model}"
+
+    result, trace = run(_traced("planner", call))
+    assert result == f"from {route.fallback}"
+    assert [(c["step"], c["model"], c["fallback"]) for c in trace] == [
+        ("planner", route.fallback, True)
+    ]
+
+
+def test_open_circuit_falls_back(run):
+    route = ROUTES["qa"]
+    breaker = resilience._stats(f"qa:{route.model}").breaker
+    breaker.opened_at = time.monotonic()
+    try:
+        result, trace = run(_traced("qa", lambda model: asyncio.sleep(0, result=model)))
+    finally:
+        breaker.record_success()
+    assert result == route.fallback
+    assert trace[0]["model"] == route.fallback and trace[0]["fallback"]
+
+
+def test_trace_records_each_completed_call(run):
+    async def go():
+        token = start_model_trace()
+        try:
+            await routed_call("planner", lambda model: asyncio.sleep(0.01, result="plan"))
+            await routed_call("summary", lambda model: asyncio.sleep(0, result="sum"), input_chars=70_000)
+            return get_model_trace()
+        finally:
+            reset_model_trace(token)
+
+    trace = run(go())
+    assert [(c["step"], c["model"], c["fallback"]) for c in trace] == [
+        ("planner", OPENAI_FAST_MODEL, False),
+        ("summary", OPENAI_STRONG_MODEL, False),
+    ]
+    assert trace[0]["latency_ms"] >= 10
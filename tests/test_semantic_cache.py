@@ -0,0 +1,71 @@
+import pytest
+
+from app.graph import _cache_scope
+from app.utils.documents import documents
+from app.utils.semantic_cache import HashingEmbedder, SemanticAnswerCache
+
+
+def test_scope_without_documents_is_per_thread():
+    a = _cache_scope({"thread_id": "alice", "active_doc_ids": []}, "qa")
+    b = _cache_scope({"thread_id": "bob", "active_doc_ids": []}, "qa")
+    assert a != b
+
+
+def test_scope_with_documents_is_shared_by_content():
+    text = "Shared memo: the launch moved to March."
+    da = documents.add("scope-a", text, "text", "memo.txt")
+    db = documents.add("scope-b", text, "text", "memo.txt")
+    a = _cache_scope({"thread_id": "scope-a", "active_doc_ids": [da.doc_id]}, "qa")
+    b = _cache_scope({"thread_id": "scope-b", "active_doc_ids": [db.doc_id]}, "qa")
+    assert a == b
+    assert a != _cache_scope({"thread_id": "scope-a", "active_doc_ids": []}, "qa")
+
+
+def test_conversation_answers_do_not_leak_between_users(api):
+    first = api.post("/api/chat", data={"text": "Hello, tell me a joke", "thread_id": "user-1"}).json()
+    second = api.post("/api/chat", data={"text": "Hello, tell me a joke", "thread_id": "user-2"}).json()
+    assert first["plan"]["task"] == "conversation"
+    assert not second["cached"]
+
+
+def _cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(
+        HashingEmbedder(), threshold=0.85, ttl=60, max_per_scope=16, max_scopes=4
+    )
+
+
+async def _ask_after(cache: SemanticAnswerCache, stored: str, asked: str):
+    first = await cache.lookup("doc", stored)
+    cache.store("doc", stored, "cached answer", first.embedding)
+    return await cache.lookup("doc", asked)
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("What is the deadline for project A?", "What is the deadline for project B?"),
+        ("How many items are in the invoice?", "How many items are not in the invoice?"),
+        ("What was revenue in 2023?", "What was revenue in 2024?"),
+        ("What did Alice approve?", "What did Bob approve?"),
+        ("Which tasks are done?", "Which tasks aren't done?"),
+        ("Who approved the budget?", "When was the budget approved?"),
+        ("Where is the meeting?", "When is the meeting?"),
+        ("Why did sales drop?", "How did sales drop?"),
+    ],
+)
+def test_near_miss_questions_do_not_hit(run, stored, asked):
+    found = run(_ask_after(_cache(), stored, asked))
+    assert not found.hit
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("What are the action items?", "what are the action items"),
+        ("What is the deadline for project A?", "what's the deadline for project A?"),
+        ("Who approved the budget?", "who approved the budget"),
+    ],
+)
+def test_paraphrases_still_hit(run, stored, asked):
+    found = run(_ask_after(_cache(), stored, asked))
+    assert found.hit and found.answer == "cached answer"
@@ -0,0 +1,4 @@
+def test_text_turn_round_trip(api):
+    r = api.post("/api/chat", data={"text": "Hi!", "thread_id": "smoke"})
+    assert r.status_code == 200
+    assert r.json()["result"].startswith("stub answer")
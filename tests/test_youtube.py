@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.extractors import youtube_link
+from app.extractors.youtube_link import (
+    TranscriptUnavailable,
+    clear_transcript_cache,
+    fetch_youtube_transcript_async,
+    set_transcript_fetcher,
+)
+from app.utils.documents import documents
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_transcript_cache()
+    yield
+    set_transcript_fetcher(None)
+    clear_transcript_cache()
+
+
+def _unavailable(video_id: str) -> str:
+    raise RuntimeError("transcripts disabled")
+
+
+def test_failure_raises_and_is_not_cached(run):
+    with pytest.raises(TranscriptUnavailable):
+        run(fetch_youtube_transcript_async(URL, _unavailable))
+    assert run(fetch_youtube_transcript_async(URL, lambda vid: "now it works")) == "now it works"
+
+
+def test_failed_fetch_registers_no_document(api):
+    set_transcript_fetcher(_unavailable)
+    r = api.post("/api/chat", data={"text": f"Summarize {URL}", "thread_id": "yt-fail"})
+    assert r.status_code == 200
+    assert documents.list("yt-fail") == []
+    assert any("Transcript not available" in line for line in r.json()["logs"])
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_fetch(run):
+    release = threading.Event()
+    calls = []
+
+    def slow(video_id: str) -> str:
+        calls.append(video_id)
+        release.wait(5)
+        return "shared transcript"
+
+    async def go():
+        first = asyncio.create_task(fetch_youtube_transcript_async(URL, slow))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(fetch_youtube_transcript_async(URL, slow))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        return first, await second
+
+    first, text = run(go())
+    assert first.cancelled()
+    assert text == "shared transcript"
+    assert len(calls) == 1
+    assert not youtube_link._inflight